@@ -0,0 +1,185 @@
+from multiprocessing import get_context
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+
+from rushhour import (SearchBudget, SearchTree, WeightedAStarSearchTree, BeamSearchTree, SEARCHES, ALGORITHM_OPTIONS, BATCH_HEURISTICS,
+                      IDA_MAX_EXPANSIONS, batch_algorithms, cache_algorithm_name, read_puzzles)
+
+BASELINE_VERSION = 1
+PERCENTILES = [50, 90, 99]
+
+# returns the set of puzzle numbers of a selection such as "1-5,8" (None selects every puzzle)
+def parse_selection(selection):
+    if selection is None:
+        return None
+    numbers = set()
+    for part in selection.split(","):
+        first, _, last = part.partition("-")
+        numbers.update(range(int(first), int(last or first) + 1))
+    return numbers
+
+# returns the value at percentile (0-100) of sorted values (nearest rank)
+def percentile(values, percent):
+    rank = max(0, min(len(values) - 1, int(round(percent / 100 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+# returns the SearchTree keyword arguments of an algorithm: tree_options without the options of the other algorithms
+def algorithm_tree_options(algorithm, tree_options):
+    other_options = set(sum(ALGORITHM_OPTIONS.values(), [])) - set(ALGORITHM_OPTIONS.get(algorithm, []))
+    return {option: value for option, value in tree_options.items() if option not in other_options}
+
+"""
+Runs one search on a new tree created with tree_options, dispatched through rushhour.SEARCHES.
+IDA* searches without a budget are limited to IDA_MAX_EXPANSIONS expansions, as in the batches of rushhour.py.
+Returns (SearchResult, tree).
+"""
+def run_search(puzzle, puzzle_number, algorithm, heuristic, tree_options=None, budget=None):
+    if (budget is None) and (algorithm == "IDA*"):
+        budget = SearchBudget(max_expansions=IDA_MAX_EXPANSIONS)
+    tree_class, search = SEARCHES[algorithm]
+    tree = tree_class(puzzle, puzzle_number, **algorithm_tree_options(algorithm, tree_options or {}))
+    return search(tree, heuristic, False, budget), tree
+
+"""
+Benchmarks one (puzzle, algorithm, heuristic) case: warmup runs, then timed runs.
+case is (puzzle number, puzzle fields, algorithm, heuristic, warmup, repeat, tree options, SearchBudget or None).
+Runs in its own process (see run_case) so the peak RSS is the peak of the case, including the processes of a
+parallel search.
+Returns the statistics of the case as a dictionary.
+"""
+def benchmark_case(case):
+    puzzle_number, puzzle, algorithm, heuristic, warmup, repeat, tree_options, budget = case
+    for _ in range(warmup):
+        run_search(puzzle, puzzle_number, algorithm, heuristic, tree_options, budget)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results, tree = run_search(puzzle, puzzle_number, algorithm, heuristic, tree_options, budget)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    median = percentile(times, 50)
+    statistics = {"solution_length": results[0],
+                  "expansions": tree.closed_count,
+                  "generated": tree.generated_count,
+                  "status": results.describe(),
+                  "expansions_per_second": round(tree.closed_count / median, 1) if median > 0 else None,
+                  "peak_rss_kb": max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss),
+                  "min_time": round(times[0], 6)}
+    for percent in PERCENTILES:
+        statistics["p" + str(percent) + "_time"] = round(percentile(times, percent), 6)
+    return statistics
+
+# sends the statistics of benchmark_case through connection (target of the process of run_case)
+def send_case(case, connection):
+    connection.send(benchmark_case(case))
+    connection.close()
+
+# runs benchmark_case in a new process (not a pool worker: the workers of a parallel search need a non-daemon parent)
+def run_case(case):
+    context = get_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=send_case, args=(case, sender))
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        raise RuntimeError("Benchmark of " + case_name(case[0], case[2], case[3], case[6]) + " exited with code " + str(process.exitcode)) from None
+    finally:
+        process.join()
+        receiver.close()
+
+# returns the name of a case in the baseline (with the tree options that change the search, e.g. the weight of weighted A*)
+def case_name(puzzle_number, algorithm, heuristic, tree_options=None):
+    return str(puzzle_number) + "/" + cache_algorithm_name(algorithm, tree_options or {}, heuristic) + "/" + ("N/A" if heuristic is None else "h" + str(heuristic))
+
+"""
+Compares the cases of a run with a baseline.
+A case regresses when its median time, expansions, generated nodes or peak RSS exceed the baseline by more
+than threshold (a fraction). Returns the list of regression messages.
+"""
+def compare(cases, baseline, threshold):
+    regressions = []
+    for name, statistics in cases.items():
+        reference = baseline["cases"].get(name)
+        if reference is None: continue # new case
+        for metric in ("p50_time", "expansions", "generated", "peak_rss_kb"):
+            if reference[metric] and statistics[metric] > reference[metric] * (1 + threshold):
+                regressions.append("%s: %s %s -> %s (+%.1f%%)" % (name, metric, reference[metric], statistics[metric],
+                                                                   100 * (statistics[metric] / reference[metric] - 1)))
+        if statistics["solution_length"] != reference["solution_length"]:
+            regressions.append("%s: solution_length %s -> %s" % (name, reference["solution_length"], statistics["solution_length"]))
+    return regressions
+
+# Runner
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks the searches of rushhour.py on puzzles and checks them against a JSON baseline")
+    parser.add_argument("input", nargs="?", default="puzzles.txt", help="puzzle file")
+    parser.add_argument("--puzzles", default=None, help="puzzle numbers to run, e.g. 1-5,8 (default: all)")
+    parser.add_argument("--algorithms", default="UCS,GBFS,Algorithm A", help="comma-separated algorithms (" + ", ".join(SEARCHES) + ")")
+    parser.add_argument("--heuristics", type=lambda value: [int(h) for h in value.split(",")], default=BATCH_HEURISTICS,
+                        help="comma-separated heuristics run with every algorithm but UCS and Retrograde")
+    parser.add_argument("--weight", type=float, default=WeightedAStarSearchTree.DEFAULT_WEIGHT, help="weight of Weighted A*")
+    parser.add_argument("--beam-width", type=int, default=BeamSearchTree.DEFAULT_WIDTH, help="nodes kept per level by Beam")
+    parser.add_argument("--transposition-table", type=int, default=0, help="states kept in the transposition table of IDA* (0 disables it)")
+    parser.add_argument("--search-workers", type=int, default=1, help="processes of a parallel Algorithm A search")
+    parser.add_argument("--vectorized", action="store_true", help="generate and score children with NumPy")
+    parser.add_argument("--timeout", type=float, default=None, help="time limit of every run (in seconds)")
+    parser.add_argument("--max-expansions", type=int, default=None, help="maximum number of expansions of every run (IDA* stops after " + str(IDA_MAX_EXPANSIONS) + " without a limit)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before the timed runs of every case")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of every case")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file the results are written to")
+    parser.add_argument("--baseline", default=None, help="JSON file of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed regression over the baseline (0.10 is 10%%)")
+    args = parser.parse_args()
+
+    selection = parse_selection(args.puzzles)
+    algorithms = [algorithm.strip() for algorithm in args.algorithms.split(",")]
+    unknown_algorithms = [algorithm for algorithm in algorithms if algorithm not in SEARCHES]
+    if unknown_algorithms:
+        parser.error("unknown algorithm " + ", ".join(unknown_algorithms))
+    unknown_heuristics = [heuristic for heuristic in args.heuristics if heuristic not in SearchTree.HEURISTICS]
+    if unknown_heuristics:
+        parser.error("unknown heuristic " + ", ".join(str(heuristic) for heuristic in unknown_heuristics))
+    tree_options = {"weight": args.weight, "beam_width": args.beam_width, "transposition_size": args.transposition_table,
+                    "search_workers": args.search_workers, "vectorized": args.vectorized}
+    budget = None
+    if (args.timeout is not None) or (args.max_expansions is not None):
+        budget = SearchBudget(args.max_expansions, args.timeout)
+    cases = [(record.number, record.fields, algorithm, heuristic, args.warmup, args.repeat, tree_options, budget)
+             for record in read_puzzles(args.input)
+             if (record.error is None) and ((selection is None) or (record.number in selection))
+             for algorithm, heuristic in batch_algorithms(args.heuristics, retrograde=True, ida=True, weighted=True, beam=True)
+             if algorithm in algorithms]
+
+    results = {}
+    for case in cases: # one process per case
+        statistics = run_case(case)
+        name = case_name(case[0], case[2], case[3], tree_options)
+        results[name] = statistics
+        print("%-44s %8d expansions %10.1f exp/s  p50 %.4fs  p90 %.4fs  %d KB" % (name, statistics["expansions"], statistics["expansions_per_second"] or 0,
+                                                                                 statistics["p50_time"], statistics["p90_time"], statistics["peak_rss_kb"]))
+
+    with open(args.output, 'w') as output_file:
+        json.dump({"version": BASELINE_VERSION,
+                   "python": platform.python_version(),
+                   "platform": platform.platform(),
+                   "warmup": args.warmup,
+                   "repeat": args.repeat,
+                   "cases": results}, output_file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("version") != BASELINE_VERSION:
+            sys.exit("Baseline " + args.baseline + " has an unsupported version")
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+        print("No regression over " + args.baseline)
@@ -1,60 +1,143 @@
-from operator import itemgetter, attrgetter
-from copy import deepcopy
+from operator import attrgetter
+from array import array
+from heapq import heappush, heappop, nsmallest
+from collections import OrderedDict, deque
+from itertools import count, product
+from math import isqrt
+from multiprocessing import Pool, get_context
+from queue import Queue, Empty
+from threading import Thread
+import argparse
+import gzip
+import hashlib
+import json
+import mmap
 import os.path
+import sqlite3
+import struct
+import sys
 import time
 import csv
 
+try:
+    import numpy as np
+except ImportError: # the vectorized mode falls back to the per-node path without NumPy
+    np = None
+
 class RushHour:
     """
-        RushHour class represents an 6x6 rush-hour type puzzle. ...
+        RushHour class represents a rush-hour type puzzle (6x6 by default, or any width x height). ...
+        A square board is a string of its cells, row by row (36 cells for 6x6, 64 for 8x8...); the rows of any
+        board can also be separated by '/'. The exit is at the right end of the middle row (row 2 of a 6x6 board).
     """
 
     ACTIONS = ['up', 'right', 'down', 'left']
+    UP, RIGHT, DOWN, LEFT = range(4) # action codes (indices in ACTIONS)
 
     def __init__(self, p):
         self.string_puzzle = None
-        self.board = [['.','.','.','.','.','.'],
-                      ['.','.','.','.','.','.'],
-                      ['.','.','.','.','.','.'],
-                      ['.','.','.','.','.','.'],
-                      ['.','.','.','.','.','.'],
-                      ['.','.','.','.','.','.']]
+        self.width, self.height = self.board_shape(p[0])
+        self.exit_row = self.get_exit_row(self.height) # row of the ambulance and of the exit
+        self.board = [['.'] * self.height for _ in range(self.width)]
         self.fuel = {}
         self.cars = []
+        self.geometry = {} # car -> CarGeometry (orientation, length and line of the car)
         self.initialize_game(p)
 
     # initializes the state of the game
     def initialize_game(self, p):
         self.string_puzzle = p[0]
+        cells = self.string_puzzle.replace("/", "")
 
         # set the game board according to the list
-        a_coordinates = []
+        car_coordinates = {} # car -> coordinates of the car on the board
         list_index = 0
-        for y in range(0, 6):
-            for x in range(0, 6):
-                if (self.string_puzzle[list_index] not in self.cars) and (self.string_puzzle[list_index] != "."): self.cars.append(self.string_puzzle[list_index]) # add car to car list
-                self.board[x][y] = self.string_puzzle[list_index]
-                if (self.string_puzzle[list_index] == 'A'): a_coordinates.append((x, y)) # save ambulance coordinates
+        for y in range(0, self.height):
+            for x in range(0, self.width):
+                if (cells[list_index] not in self.cars) and (cells[list_index] != "."): self.cars.append(cells[list_index]) # add car to car list
+                self.board[x][y] = cells[list_index]
+                if (cells[list_index] != "."): car_coordinates.setdefault(cells[list_index], []).append((x, y)) # save car coordinates
                 if (self.board[x][y] not in self.fuel) and (self.board[x][y] != '.'):
                     self.fuel[self.board[x][y]] = 100
                 list_index += 1
         
         # check if Ambulance (A) is horizontal in the middle of the board
-        is_a_valid = all([True if coordinate[1] == 2 else False for coordinate in a_coordinates])
+        is_a_valid = all([True if coordinate[1] == self.exit_row else False for coordinate in car_coordinates.get('A', [])])
         if not is_a_valid: raise ValueError('Ambulance not properly placed on the board')
 
+        # record the geometry of every car once
+        for car in self.cars:
+            self.geometry[car] = CarGeometry(car, car_coordinates[car], self.width, self.height, self.exit_row)
+
         # modify fuel levels if provided
         if len(p) > 1:
             for fuel_info in p[1:]:
                 car = fuel_info[0]
                 fuel_amount = int(fuel_info[1:])
                 self.fuel[car] = fuel_amount
+
+        self.bitboard = BitBoard([self.geometry[car] for car in self.cars], self.board, self.fuel, self.width, self.height, self.exit_row) # packed representation used by the search
+
+    """
+        Returns (width, height) of a board string: rows separated by '/', or the cells of a square board.
+        Returns None if the rows have different widths or the cells do not make a square.
+    """
+    @staticmethod
+    def board_shape(string_puzzle):
+        if "/" in string_puzzle:
+            rows = string_puzzle.split("/")
+            if len({len(row) for row in rows}) != 1: return None
+            return len(rows[0]), len(rows)
+        side = isqrt(len(string_puzzle))
+        if side * side != len(string_puzzle): return None
+        return side, side
+
+    # returns the row of the ambulance and of the exit of a board (row 2 of a 6x6 board)
+    @staticmethod
+    def get_exit_row(height):
+        return (height - 1) // 2
     
+    """
+        Checks the fields of a puzzle line (board string and fuel overrides) before a RushHour is created.
+        Returns the reason the puzzle is not configured properly (None if it is valid).
+    """
+    @staticmethod
+    def check_puzzle(p):
+        if not p: return "empty puzzle"
+        shape = RushHour.board_shape(p[0])
+        if (shape is None) and ("/" in p[0]):
+            return "rows of the board have different widths"
+        if shape is None:
+            return "board has " + str(len(p[0])) + " cells, which is not a square (separate the rows of other boards with '/')"
+        width, height = shape
+        if (width < 2) or (height < 1):
+            return "board is " + str(width) + "x" + str(height)
+        string_puzzle = p[0].replace("/", "")
+        car_cells = {} # car -> cells of the car in the string
+        for cell, car in enumerate(string_puzzle):
+            if car == ".": continue
+            if not car.isalpha(): return "invalid character '" + car + "'"
+            car_cells.setdefault(car, []).append(cell)
+        for car, cells in car_cells.items():
+            rows = {cell // width for cell in cells}
+            step = 1 if len(rows) == 1 else width # horizontal or vertical car
+            if (len(cells) < 2) or any(cells[i + 1] - cells[i] != step for i in range(len(cells) - 1)):
+                return "car " + car + " is not a straight line of at least 2 cells"
+        if "A" not in car_cells: return "no ambulance"
+        if any(cell // width != RushHour.get_exit_row(height) for cell in car_cells["A"]) or (car_cells["A"][1] - car_cells["A"][0] != 1):
+            return "Ambulance not properly placed on the board"
+        for fuel_info in p[1:]:
+            if (len(fuel_info) < 2) or (not fuel_info[1:].isdigit()):
+                return "invalid fuel '" + fuel_info + "'"
+            if fuel_info[0] not in car_cells:
+                return "fuel of car " + fuel_info[0] + " which is not on the board"
+        return None
+
     # returns string representation from board representation
     def generate_string_from_board(self, board):
         string = ""
-        for y in range(0, 6):
-            for x in range(0, 6):
+        for y in range(0, self.height):
+            for x in range(0, self.width):
                 string = string + board[x][y]
         return string
 
@@ -62,9 +145,12 @@ class RushHour:
     def get_car_coordinates(self, car, board=None):
         if board is None:
             board = self.board
+        if car in self.geometry: # only the line of the car needs to be looked at
+            position = self.geometry[car].find(board)
+            return self.geometry[car].coordinates(position) if position >= 0 else []
         car_coordinates = []
-        for y in range(0, 6):
-            for x in range(0, 6):
+        for y in range(0, self.height):
+            for x in range(0, self.width):
                 if board[x][y] == car: car_coordinates.append((x, y))
         return car_coordinates
 
@@ -74,8 +160,8 @@ class RushHour:
         if board is None:
             board = self.board
         print()
-        for y in range(0, 6):
-            for x in range(0, 6):
+        for y in range(0, self.height):
+            for x in range(0, self.width):
                 print(F'{board[x][y]}', end="")
             print()
         print()
@@ -84,15 +170,24 @@ class RushHour:
     def stringify_board(self, string_puzzle=None):
         if string_puzzle is None:
             string_puzzle = self.string_puzzle
-        return f'{"".join(string_puzzle[:6])}\n' \
-               f'{"".join(string_puzzle[6:12])}\n' \
-               f'{"".join(string_puzzle[12:18])}\n' \
-               f'{"".join(string_puzzle[18:24])}\n' \
-               f'{"".join(string_puzzle[24:30])}\n' \
-               f'{"".join(string_puzzle[30:36])}\n' \
+        cells = string_puzzle.replace("/", "")
+        return "".join(f'{cells[y * self.width:(y + 1) * self.width]}\n' for y in range(0, self.height))
 
     # validates move
     def is_valid(self, car, action, moves, fuel=None, board=None):
+        return self.preview_state(car, action, moves, fuel, board) is not None
+
+    # checks if the game is done
+    def is_end(self, board=None):
+        if board is None:
+            board = self.board
+        return self.bitboard.is_end((self.bitboard.encode_board(board), 0))
+
+    """
+        Returns the BitBoard state resulting from applying a specific action.
+        If action is not allowed, returns None
+    """
+    def preview_state(self, car, action, moves, fuel=None, board=None):
         if board is None:
             board = self.board
         if fuel is None:
@@ -100,136 +195,692 @@ class RushHour:
 
         # invalid inputs
         if ((car not in fuel) or 
+            (car not in self.bitboard.car_index) or
             (action not in self.ACTIONS) or
             (not str(moves).isdigit()) or (moves < 1)):
-            return False
-
-        if fuel[car] < moves: # car has insufficient fuel
-            return False
-
-        # get car coordinates on board
-        car_coordinates = self.get_car_coordinates(car, board)
-
-        is_vertical = all([True if coordinate[0] == car_coordinates[0][0] else False for coordinate in car_coordinates]) # check if car is vertical
-        
-        if action == 'up':
-            if not is_vertical:
-                return False
-            # find coordinate with the lowest y value
-            coordinate = min(car_coordinates,key=itemgetter(1))
-            if (coordinate[1] == 0) or (coordinate[1] - moves < 0): # invalid moves (out of board)
-                return False
-            # another car is obstructing the move
-            for i in range(1, moves + 1):
-                if board[coordinate[0]][coordinate[1] - i] != '.':
-                    return False
-        elif action == 'right':
-            if is_vertical:
-                return False
-            # find coordinate with the highest x value
-            coordinate = max(car_coordinates,key=itemgetter(0))
-            if (coordinate[0] == 5) or (coordinate[0] + moves > 5): # invalid moves (out of board)
-                return False
-            # another car is obstructing the move
-            for i in range(1, moves + 1):
-                if board[coordinate[0] + i][coordinate[1]] != '.':
-                    return False
-        elif action == 'down':
-            if not is_vertical:
-                return False
-            # find coordinate with the highest y value
-            coordinate = max(car_coordinates,key=itemgetter(1))
-            if (coordinate[1] == 5) or (coordinate[1] + moves > 5): # invalid moves (out of board)
-                return False
-            # another car is obstructing the move
-            for i in range(1, moves + 1):
-                if board[coordinate[0]][coordinate[1] + i] != '.':
-                    return False
-        elif action == 'left':
-            if is_vertical:
-                return False
-            # find coordinate with the lowest x value
-            coordinate = min(car_coordinates,key=itemgetter(0))
-            if (coordinate[0] == 0) or (coordinate[0] - moves < 0): # invalid moves (out of board)
-                return False
-            # another car is obstructing the move
-            for i in range(1, moves + 1):
-                if board[coordinate[0] - i][coordinate[1]] != '.':
-                    return False
-                    
-        return True
+            return None
 
-    # checks if the game is done
-    def is_end(self, board=None):
-        if board is None:
-            board = self.board
-        # get coordinates of Ambulance (A)
-        a_coordinates = self.get_car_coordinates('A', board)
-        x_coordinate = max(a_coordinates,key=itemgetter(0))[0] # A's highest x-coordinate value
-        if (x_coordinate == 5): return True
-        else: return False
+        state = (self.bitboard.encode_board(board), self.bitboard.encode_fuel(fuel))
+        return self.bitboard.move(state, self.bitboard.car_index[car], action, moves)
 
     """
         Returns (string, board, fuel) resulting from applying a specific action.
         If action is not allowed, returns None
     """
     def preview_action(self, car, action, moves, fuel=None, board=None):
-        if board is None:
-            board = self.board
         if fuel is None:
             fuel = self.fuel
 
-        if self.is_valid(car, action, moves, fuel, board):
-            board_preview = deepcopy(board)
-            fuel_preview = deepcopy(fuel)
-
-            # get car coordinates on board
-            car_coordinates = self.get_car_coordinates(car, board)
-
-            # replace current car coordinates with empty space
-            for coordinate in car_coordinates:
-                board_preview[coordinate[0]][coordinate[1]] = '.'
-
-            # handle new movement change
-            if action == 'up':
-                for coordinate in car_coordinates:
-                    board_preview[coordinate[0]][coordinate[1] - moves] = car
-            elif action == 'right':
-                for coordinate in car_coordinates:
-                    board_preview[coordinate[0] + moves][coordinate[1]] = car
-                # remove car (except car 'A') if in valet position
-                new_coordinates = self.get_car_coordinates(car, board_preview)
-                x_coordinate = max(new_coordinates,key=itemgetter(0))[0] # car's highest x-coordinate value
-                if ((all([True if coordinate[1] == 2 else False for coordinate in new_coordinates])) # car is in middle row
-                    and (x_coordinate == 5) # car is all the way right
-                    and (car != 'A')): # car is not ambulance
-                    for coordinate in new_coordinates:
-                        board_preview[coordinate[0]][coordinate[1]] = '.' # replace new car coordinates with empty space
-            elif action == 'down':
-                for coordinate in car_coordinates:
-                    board_preview[coordinate[0]][coordinate[1] + moves] = car
-            else:  # left
-                for coordinate in car_coordinates:
-                    board_preview[coordinate[0] - moves][coordinate[1]] = car
-
-            # update other preview components
-            fuel_preview[car] = fuel_preview[car] - moves
-            string_preview = self.generate_string_from_board(board_preview)
-
-            return string_preview, board_preview, fuel_preview
+        state = self.preview_state(car, action, moves, fuel, board)
+        if state is None:
+            return None
+
+        fuel_preview = dict(fuel)
+        fuel_preview[car] = fuel_preview[car] - moves
+        return self.bitboard.to_string(state), self.bitboard.to_board(state), fuel_preview
+
+class CarGeometry:
+    """
+    CarGeometry holds the fixed geometry of a car, recorded once when the puzzle is loaded.
+    A car only slides along its line (its row if horizontal, its column if vertical), so its place on the board
+    is a single position: the x (horizontal car) or y (vertical car) of its first cell, or -1 once it has left
+    through the exit. Masks and swept cells for every position are precomputed for the BitBoard.
+    """
+    def __init__(self, car, coordinates, width, height, exit_row):
+        self.car = car
+        self.is_vertical = all([True if coordinate[0] == coordinates[0][0] else False for coordinate in coordinates])
+        self.length = len(coordinates)
+        if self.is_vertical:
+            self.line = coordinates[0][0] # fixed column
+            self.position = min(coordinate[1] for coordinate in coordinates)
+            line_length = height
+        else:
+            self.line = coordinates[0][1] # fixed row
+            self.position = min(coordinate[0] for coordinate in coordinates)
+            line_length = width
+        self.last_position = line_length - self.length # position of a car touching the bottom/right edge
+        # horizontal cars (except the ambulance) are removed when they reach the exit
+        self.exits = (not self.is_vertical) and (self.line == exit_row) and (car != 'A')
+
+        self.cells = [[y * width + x for (x, y) in self.coordinates(position)] for position in range(self.last_position + 1)]
+        self.masks = [sum(1 << cell for cell in cells) for cells in self.cells]
+        # sweeps[a][b]: cells covered by the car on its way from position a to position b
+        self.sweeps = [[0] * (self.last_position + 1) for _ in range(self.last_position + 1)]
+        for start in range(self.last_position + 1):
+            for end in range(self.last_position + 1):
+                for position in range(min(start, end), max(start, end) + 1):
+                    self.sweeps[start][end] |= self.masks[position]
+
+    # returns the coordinates of the car at a position
+    def coordinates(self, position):
+        if self.is_vertical:
+            return [(self.line, position + i) for i in range(self.length)]
+        return [(position + i, self.line) for i in range(self.length)]
+
+    # returns the position of the car on a list board (-1 if the car is not on the board)
+    def find(self, board):
+        for position in range(self.last_position + 1):
+            x, y = (self.line, position) if self.is_vertical else (position, self.line)
+            if board[x][y] == self.car:
+                return position
+        return -1
+
+class BitBoard:
+    """
+    BitBoard is the packed state representation of a RushHour puzzle used by the search trees.
+    Cell (x, y) is bit (y * width + x), the same index the cell has in the puzzle string (without '/'), so
+    masks are integers of width * height bits whatever the size of the board.
+    A state is a tuple (positions, fuel): positions holds the CarGeometry position of every car
+    and fuel packs the fuel left of every car into a single integer.
+    Moves, validity checks, goal tests and hashing are done on integers and occupancy bitmasks;
+    the string and list representations are only rebuilt for output.
+    """
+
+    def __init__(self, geometry, board, fuel, width=6, height=6, exit_row=2):
+        self.geometry = geometry # CarGeometry of every car (the position of a car in this list is its index in a state)
+        self.width = width
+        self.height = height
+        self.exit_row = exit_row
+        self.cars = [car.car for car in geometry]
+        self.car_index = {car: i for i, car in enumerate(self.cars)}
+        self.exit_row_mask = ((1 << width) - 1) << (exit_row * width)
+        self.exit_mask = 1 << (exit_row * width + width - 1) # right-most cell of the exit row
+        self.fuel_value_bits = max([7] + [fuel[car].bit_length() for car in self.cars])
+        self.fuel_bits = self.fuel_value_bits + 1 # bits used by each car in the packed fuel (the top bit is a guard bit, always 0)
+        self.fuel_mask = (1 << self.fuel_value_bits) - 1
+        self.fuel_guard = sum(1 << (i * self.fuel_bits + self.fuel_value_bits) for i in range(len(self.cars)))
+        self.fuel_caps = {} # moves -> packed fuel a car can use at most in that many moves (see fuel_cap)
+        self.ambulance = self.car_index.get('A')
+        # blocked_regions[p]: cells of the exit row to the right of the ambulance at position p
+        self.blocked_regions = []
+        if self.ambulance is not None:
+            for mask in geometry[self.ambulance].masks:
+                self.blocked_regions.append(self.exit_row_mask & ~((1 << mask.bit_length()) - 1))
+        self.initial_state = (self.encode_board(board), self.encode_fuel(fuel))
+
+    # returns the car positions of a list board
+    def encode_board(self, board):
+        return tuple(car.find(board) for car in self.geometry)
+
+    # returns the packed fuel of a fuel dictionary
+    def encode_fuel(self, fuel):
+        packed = 0
+        for i, car in enumerate(self.cars):
+            if fuel.get(car, 0) > self.fuel_mask:
+                raise ValueError('Fuel of car ' + car + ' does not fit in the packed state')
+            packed |= fuel.get(car, 0) << (i * self.fuel_bits)
+        return packed
+
+    # returns the fuel left of a car in a state
+    def car_fuel(self, state, car):
+        return (state[1] >> (self.car_index[car] * self.fuel_bits)) & self.fuel_mask
+
+    # returns the fuel left of a car (index) in a state
+    def fuel_of(self, state, car):
+        return (state[1] >> (car * self.fuel_bits)) & self.fuel_mask
+
+    # returns the occupancy mask of every car (0 for cars that left)
+    def masks(self, state):
+        return [car.masks[position] if position >= 0 else 0 for car, position in zip(self.geometry, state[0])]
+
+    # returns the mask of all occupied cells
+    def occupancy(self, state):
+        occupied = 0
+        for car, position in zip(self.geometry, state[0]):
+            if position >= 0: occupied |= car.masks[position]
+        return occupied
+
+    # returns the cells of the exit row to the right of the ambulance
+    def blocked_region(self, state):
+        return self.blocked_regions[state[0][self.ambulance]]
+
+    """
+        Returns (bound, dead) from the graph of the cars blocking the ambulance in a state.
+        bound is a lower bound of the moves left: one move of the ambulance, one move of every car between the
+        ambulance and the exit, and one more move for every blocker that cannot get out of the way before another
+        car moves (counted over disjoint sets of those other cars, so no car is counted twice).
+        dead is True when the ambulance or a blocker does not have the fuel or the room to ever get out of the way.
+    """
+    def blocker_graph(self, state):
+        if self.is_end(state): return 0, False
+        ambulance = self.geometry[self.ambulance]
+        dead = self.fuel_of(state, self.ambulance) < ambulance.last_position - state[0][self.ambulance]
+        region = self.blocked_region(state)
+        masks = self.masks(state)
+        blockers = [car for car, mask in enumerate(masks) if mask & region]
+        counted = set(blockers) # cars already counted in the bound
+        counted.add(self.ambulance)
+
+        constraints = [] # sets of uncounted cars of which one has to move
+        for blocker in blockers:
+            helpers = self.blocker_helpers(state, blocker, masks)
+            if helpers is None: # blocker can get out of the way on its own
+                continue
+            if not helpers: # blocker can never get out of the way
+                dead = True
+            if helpers & counted:
+                continue
+            constraints.append(helpers)
+
+        bound = 1 + len(blockers)
+        used = set()
+        for helpers in sorted(constraints, key=len):
+            if not (helpers & used): # disjoint from the sets already counted
+                bound += 1
+                used |= helpers
+        return bound, dead
+
+    """
+        Returns None if a blocker can leave the exit row without another car moving first.
+        Otherwise returns the set of cars of which one has to move first (empty if the blocker can never leave).
+    """
+    def blocker_helpers(self, state, car, masks):
+        geometry = self.geometry[car]
+        position = state[0][car]
+        fuel = self.fuel_of(state, car)
+        if geometry.is_vertical:
+            targets = [self.exit_row - geometry.length, self.exit_row + 1] # just above or just below the exit row
+        elif geometry.exits:
+            if position == geometry.last_position: # has to back up before it can leave (assumes room to back up)
+                return None if fuel >= 2 else set()
+            targets = [geometry.last_position] # leaves through the exit
         else:
+            return set()
+
+        helpers = set()
+        for target in targets:
+            if (target < 0) or (target > geometry.last_position) or (fuel < abs(target - position)):
+                continue
+            cells = geometry.sweeps[position][target] & ~masks[car] # cells the blocker has to cross
+            occupants = {other for other, mask in enumerate(masks) if mask & cells}
+            if not occupants:
+                return None
+            helpers |= occupants
+        return helpers
+
+    # checks if every car has at least as much fuel in packed fuel as in other_fuel (the guard bits stop the borrows)
+    def has_more_fuel(self, fuel, other_fuel):
+        return ((fuel | self.fuel_guard) - other_fuel) & self.fuel_guard == self.fuel_guard
+
+    # returns the packed fuel every car can use at most in moves moves: moves times its longest slide
+    def fuel_cap(self, moves):
+        cap = self.fuel_caps.get(moves)
+        if cap is None:
+            cap = self.fuel_caps[moves] = sum(min(self.fuel_mask, moves * car.last_position) << (i * self.fuel_bits)
+                                              for i, car in enumerate(self.geometry))
+        return cap
+
+    """
+        Returns packed fuel with the fuel of every car lowered to its fuel in packed cap, so that fuel which cannot
+        bind within the moves of the cap compares as equal (the guard bits mark the cars with at least their cap).
+    """
+    def clamp_fuel(self, fuel, cap):
+        fields = ((((fuel | self.fuel_guard) - cap) & self.fuel_guard) >> self.fuel_value_bits) * self.fuel_mask
+        return (fuel & ~fields) | (cap & fields)
+
+    # checks if the ambulance reached the exit
+    def is_end(self, state):
+        if (self.ambulance is None) or (state[0][self.ambulance] < 0): return False
+        return (self.geometry[self.ambulance].masks[state[0][self.ambulance]] & self.exit_mask) != 0
+
+    """
+        Returns the state resulting from moving car (index) by moves cells in the direction of action.
+        If action is not allowed, returns None
+    """
+    def move(self, state, car, action, moves):
+        positions, fuel = state
+        geometry = self.geometry[car]
+        position = positions[car]
+        fuel_shift = car * self.fuel_bits
+        if (position < 0) or (((fuel >> fuel_shift) & self.fuel_mask) < moves): # car left or has insufficient fuel
+            return None
+        if (action == 'up' or action == 'down') != geometry.is_vertical: # car cannot move in that direction
+            return None
+
+        new_position = position - moves if (action == 'up' or action == 'left') else position + moves
+        if (new_position < 0) or (new_position > geometry.last_position): # invalid moves (out of board)
+            return None
+        occupied = self.occupancy(state) & ~geometry.masks[position]
+        if geometry.sweeps[position][new_position] & occupied: # another car is obstructing the move
             return None
 
+        # remove car (except car 'A') if in valet position
+        if geometry.exits and (new_position == geometry.last_position):
+            new_position = -1
+
+        return positions[:car] + (new_position,) + positions[car + 1:], fuel - (moves << fuel_shift)
+
+    """
+        Yields (car index, action code, moves, state) for every move allowed in a state.
+        Every car is scanned once per direction: the slide stops at the first obstructed cell,
+        the board edge or when the car runs out of fuel.
+    """
+    def successors(self, state):
+        positions, fuel = state
+        occupied = self.occupancy(state)
+        for car, geometry in enumerate(self.geometry):
+            position = positions[car]
+            if position < 0: # car left through the exit
+                continue
+            fuel_shift = car * self.fuel_bits
+            car_fuel = (fuel >> fuel_shift) & self.fuel_mask
+            others = occupied & ~geometry.masks[position] # cells occupied by the other cars
+            for action in (RushHour.UP, RushHour.DOWN) if geometry.is_vertical else (RushHour.RIGHT, RushHour.LEFT):
+                step = -1 if (action == RushHour.UP or action == RushHour.LEFT) else 1
+                new_position = position
+                for moves in range(1, car_fuel + 1):
+                    new_position += step
+                    if (new_position < 0) or (new_position > geometry.last_position) or (geometry.masks[new_position] & others):
+                        break
+                    # remove car (except car 'A') if in valet position
+                    child_position = -1 if (geometry.exits and new_position == geometry.last_position) else new_position
+                    yield car, action, moves, (positions[:car] + (child_position,) + positions[car + 1:], fuel - (moves << fuel_shift))
+
+    # returns string representation of a state
+    def to_string(self, state):
+        cells = ['.'] * (self.width * self.height)
+        for car, position in zip(self.geometry, state[0]):
+            if position >= 0:
+                for cell in car.cells[position]:
+                    cells[cell] = car.car
+        return "".join(cells)
+
+    # returns board representation of a state
+    def to_board(self, state):
+        string = self.to_string(state)
+        return [[string[y * self.width + x] for y in range(0, self.height)] for x in range(0, self.width)]
+
+class VectorizedExpander:
+    """
+    VectorizedExpander generates and scores the children of a batch of BitBoard states with NumPy array operations.
+    A batch is a matrix of car positions (one row per state, one column per car, -1 for cars that left) and a matrix
+    of fuel levels. The mask and swept cells of every car position are kept in tables, so the occupancy of all the
+    states and the validity of a slide for the whole batch are a few table lookups, ORs and ANDs on 64-bit masks.
+    Every slide (car, direction and distance) of every state is checked at once on a states x cars x 2 x max slide
+    array, so a batch costs a fixed number of NumPy calls whatever its size.
+    Requires NumPy and a board of at most 64 cells.
+    """
+
+    HEURISTICS = (1, 2, 3, 4) # heuristics scored by score()
+
+    def __init__(self, bitboard):
+        self.bitboard = bitboard
+        geometry = bitboard.geometry
+        self.car_range = np.arange(len(geometry))
+        self.size = max([car.last_position for car in geometry] + [0]) + 2 # table index is position + 1 (0 for a car that left)
+        self.masks = np.zeros((len(geometry), self.size), dtype=np.uint64)
+        self.sweeps = np.zeros((len(geometry), self.size, self.size), dtype=np.uint64)
+        for i, car in enumerate(geometry):
+            for start in range(car.last_position + 1):
+                self.masks[i, start + 1] = car.masks[start]
+                for end in range(car.last_position + 1):
+                    self.sweeps[i, start + 1, end + 1] = car.sweeps[start][end]
+        self.last_positions = np.array([car.last_position for car in geometry], dtype=np.int64)
+        self.exits = np.array([car.exits for car in geometry], dtype=bool)
+        self.slides = np.arange(1, max(self.size - 2, 1) + 1) # cells of every slide
+        # step and action code of the two directions of every car
+        self.steps = np.array([[-1, 1] if car.is_vertical else [1, -1] for car in geometry], dtype=np.int64).reshape(len(geometry), 2)
+        self.actions = np.array([[RushHour.UP, RushHour.DOWN] if car.is_vertical else [RushHour.RIGHT, RushHour.LEFT] for car in geometry],
+                                dtype=np.int64).reshape(len(geometry), 2)
+        self.regions = np.zeros(self.size, dtype=np.uint64)
+        for position, region in enumerate(bitboard.blocked_regions):
+            self.regions[position + 1] = region
+        # the blocked region only covers the exit row, so its cells are counted with a table over one row
+        self.row_shift = np.uint64(bitboard.exit_row * bitboard.width)
+        self.row_popcount = np.array([bin(row).count("1") for row in range(1 << bitboard.width)], dtype=np.int64)
+
+    # checks if the vectorized mode can be used for a puzzle
+    @staticmethod
+    def is_available(bitboard):
+        return (np is not None) and (bitboard.width * bitboard.height <= 64)
+
+    # returns the occupancy mask of every car (states x cars) and of every state
+    def occupancy(self, positions):
+        car_masks = self.masks[self.car_range, positions + 1]
+        return car_masks, np.bitwise_or.reduce(car_masks, axis=1)
+
+    """
+        Returns the children of a list of states as arrays (parents, cars, actions, moves, positions):
+        index of the parent state, car index, index in RushHour.ACTIONS, cells moved and car positions of every child.
+        Children are grouped by parent in the same order as BitBoard.successors.
+    """
+    def expand(self, states):
+        bitboard = self.bitboard
+        cars = len(bitboard.geometry)
+        positions = np.array([state[0] for state in states], dtype=np.int64).reshape(len(states), cars)
+        packed = np.array([state[1] for state in states], dtype=object) # packed fuel may not fit in 64 bits
+        fuel = np.array([(packed >> (car * bitboard.fuel_bits)) & bitboard.fuel_mask for car in range(cars)],
+                        dtype=np.int64).reshape(cars, len(states)).T
+        car_masks, occupied = self.occupancy(positions)
+        others = (occupied[:, None] & ~car_masks)[:, :, None, None] # cells occupied by the other cars
+
+        # every slide of every car: states x cars x directions x cells moved
+        current = positions[:, :, None, None]
+        new = current + self.steps[None, :, :, None] * self.slides
+        valid = ((current >= 0) & (new >= 0) & (new <= self.last_positions[None, :, None, None])
+                 & (fuel[:, :, None, None] >= self.slides))
+        sweeps = self.sweeps[self.car_range[None, :, None, None], current + 1, np.clip(new + 1, 0, self.size - 1)]
+        valid &= (sweeps & others) == 0
+        parents, moved, directions, slides = np.nonzero(valid) # grouped by parent, then car, direction and cells moved
+        new = new[parents, moved, directions, slides]
+        new[self.exits[moved] & (new == self.last_positions[moved])] = -1 # remove car (except car 'A') if in valet position
+        children = positions[parents]
+        children[np.arange(parents.size), moved] = new
+        return parents, moved, self.actions[moved, directions], slides + 1, children
+
+    # returns the value of heuristic (1 to 4) for every row of a positions matrix
+    def score(self, positions, heuristic):
+        car_masks, occupied = self.occupancy(positions)
+        region = self.regions[positions[:, self.bitboard.ambulance] + 1] # cells of the exit row to the right of A
+        if heuristic == 1 or heuristic == 3:
+            blocked_cars = ((car_masks & region[:, None]) != 0).sum(axis=1)
+            return blocked_cars if heuristic == 1 else 2 * blocked_cars
+        if heuristic == 2:
+            return self.row_popcount[((occupied & region) >> self.row_shift).astype(np.int64)]
+        return self.row_popcount[((region & ~occupied) >> self.row_shift).astype(np.int64)]
+
+class PatternDatabase:
+    """
+    PatternDatabase is an exact distance-to-goal table for an abstraction of a puzzle: the ambulance and the cars that
+    touch the exit row, with every other car removed and fuel ignored. Removing cars and fuel only makes the puzzle
+    easier, so the distances are an admissible (and consistent) heuristic.
+    The table is built once by a backward breadth-first search from every goal state and saved under pdb/ with a
+    versioned header that is validated on load. It is memory-mapped, so the processes using a table share one copy.
+    A state is looked up by the positions of its pattern cars (mixed-radix index into the table).
+    A build stopped by the deadline of a SearchBudget is not saved and leaves the database incomplete.
+    """
+
+    MAGIC = b"RHPDB"
+    VERSION = 1
+    HEADER = struct.Struct("<5sBHI") # magic, version, signature length, number of entries
+    MAX_ENTRIES = 2000000 # pattern cars are dropped (farthest from the exit first) to keep the table under this size
+    UNREACHABLE = 255
+    CHECK_INTERVAL = 4096 # states of the backward search between two checks of the deadline of the budget
+    DIRECTORY = os.path.join(os.path.dirname(os.path.realpath(__file__)), "pdb")
+
+    tables = {} # path -> (memory-mapped table, offset of the first entry) opened in this process
+
+    def __init__(self, puzzle, budget=None):
+        bitboard = puzzle.bitboard
+        self.pattern = self.pattern_cars(bitboard) # car indices of the pattern (ambulance first)
+        geometry = [bitboard.geometry[car] for car in self.pattern]
+        self.sizes = [car.last_position + 2 if car.exits else car.last_position + 1 for car in geometry]
+        self.strides = [1] * len(self.sizes)
+        for i in range(len(self.sizes) - 2, -1, -1):
+            self.strides[i] = self.strides[i + 1] * self.sizes[i + 1]
+        self.entries = self.strides[0] * self.sizes[0]
+        self.lookup_cars = [(car, stride, bitboard.geometry[car].exits) for car, stride in zip(self.pattern, self.strides)]
+        self.signature = self.make_signature(bitboard, geometry)
+        self.path = os.path.join(self.DIRECTORY, hashlib.sha1(self.signature.encode()).hexdigest()[:16] + ".pdb")
+        self.complete = True # False if the build of the table was stopped by the budget
+        if self.path not in self.tables:
+            if not self.is_valid_file(self.path, self.signature, self.entries):
+                self.complete = self.build(geometry, self.sizes, self.strides, self.entries, self.signature, self.path, budget)
+                if not self.complete:
+                    self.table, self.offset = None, 0
+                    return
+            self.tables[self.path] = self.open_table(self.path, self.signature, self.entries)
+        self.table, self.offset = self.tables[self.path]
+
+    # returns the car indices of the pattern: the ambulance, the cars touching the exit row to its right, then the others
+    @classmethod
+    def pattern_cars(cls, bitboard):
+        ambulance = bitboard.ambulance
+        a_column = bitboard.geometry[ambulance].position
+        touching = []
+        for car, geometry in enumerate(bitboard.geometry):
+            if car != ambulance and (geometry.masks[geometry.position] & bitboard.exit_row_mask):
+                column = geometry.line if geometry.is_vertical else geometry.position
+                touching.append((column < a_column, column, car))
+        pattern = [ambulance]
+        entries = bitboard.geometry[ambulance].last_position + 1
+        for _, _, car in sorted(touching):
+            geometry = bitboard.geometry[car]
+            size = geometry.last_position + 2 if geometry.exits else geometry.last_position + 1
+            if entries * size > cls.MAX_ENTRIES: break
+            pattern.append(car)
+            entries *= size
+        return pattern
+
+    # returns the signature of a pattern: board size and the geometry of every pattern car
+    @staticmethod
+    def make_signature(bitboard, geometry):
+        cars = ["%s%d@%d%s" % ("v" if car.is_vertical else "h", car.length, car.line, "x" if car.exits else "") for car in geometry]
+        return "%dx%d/%d:%s" % (bitboard.width, bitboard.height, bitboard.exit_row, ",".join(cars))
+
+    # checks if a table file exists with the expected version, signature and size
+    @classmethod
+    def is_valid_file(cls, path, signature, entries):
+        try:
+            with open(path, "rb") as table_file:
+                magic, version, signature_length, file_entries = cls.HEADER.unpack(table_file.read(cls.HEADER.size))
+                file_signature = table_file.read(signature_length).decode()
+            size = os.path.getsize(path)
+        except (OSError, struct.error, UnicodeDecodeError):
+            return False
+        return ((magic == cls.MAGIC) and (version == cls.VERSION) and (file_signature == signature) and
+                (file_entries == entries) and (size == cls.HEADER.size + signature_length + entries))
+
+    # memory-maps a table file, returns (table, offset of the first entry)
+    @classmethod
+    def open_table(cls, path, signature, entries):
+        if not cls.is_valid_file(path, signature, entries):
+            raise ValueError("Pattern database " + path + " is not valid")
+        with open(path, "rb") as table_file:
+            table = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return table, cls.HEADER.size + len(signature.encode())
+
+    """
+        Computes the distance to the goal of every state of the abstraction with a backward breadth-first search
+        from all the states where the ambulance (first pattern car) is at the exit, and writes the table file.
+        Returns False (writing nothing) if the deadline of budget passes first.
+    """
+    @classmethod
+    def build(cls, geometry, sizes, strides, entries, signature, path, budget=None):
+        def decode(code, car): # position of a car from its code in the index
+            return code - 1 if car.exits else code
+
+        def index(positions):
+            return sum((position + 1 if car.exits else position) * stride for car, position, stride in zip(geometry, positions, strides))
+
+        def occupancy(positions):
+            occupied = 0
+            for car, position in zip(geometry, positions):
+                if position >= 0:
+                    if car.masks[position] & occupied: return None # cars overlap
+                    occupied |= car.masks[position]
+            return occupied
+
+        distances = bytearray([cls.UNREACHABLE]) * entries
+        queue = deque()
+        ambulance = geometry[0]
+        for codes in product(*[range(size) for size in sizes[1:]]):
+            positions = (ambulance.last_position,) + tuple(decode(code, car) for code, car in zip(codes, geometry[1:]))
+            if occupancy(positions) is not None:
+                distances[index(positions)] = 0
+                queue.append(positions)
+
+        for searched in count():
+            if not queue: break
+            if (budget is not None) and (searched % cls.CHECK_INTERVAL == 0) and budget.out_of_time():
+                return False
+            positions = queue.popleft()
+            distance = min(distances[index(positions)] + 1, cls.UNREACHABLE - 1)
+            occupied = occupancy(positions)
+            for i, car in enumerate(geometry):
+                position = positions[i]
+                previous_positions = []
+                if position < 0: # car left through the exit: it slid out from any position with a free way out
+                    previous_positions = [start for start in range(car.last_position) if not (car.sweeps[start][car.last_position] & occupied)]
+                elif not (car.exits and position == car.last_position): # slides are reversible
+                    others = occupied & ~car.masks[position]
+                    for step in (-1, 1):
+                        start = position + step
+                        while (0 <= start <= car.last_position) and not (car.masks[start] & others):
+                            previous_positions.append(start)
+                            start += step
+                for start in previous_positions:
+                    previous = positions[:i] + (start,) + positions[i + 1:]
+                    previous_index = index(previous)
+                    if distances[previous_index] == cls.UNREACHABLE:
+                        distances[previous_index] = distance
+                        queue.append(previous)
+
+        # write to a temporary file first so other processes never map a partial table
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = path + "." + str(os.getpid()) + ".tmp"
+        with open(temporary_path, "wb") as table_file:
+            table_file.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(signature.encode()), entries))
+            table_file.write(signature.encode())
+            table_file.write(distances)
+        os.replace(temporary_path, path)
+        return True
+
+    # returns the distance to the goal of the abstraction of a state (None if the goal cannot be reached)
+    def lookup(self, state):
+        positions = state[0]
+        index = self.offset
+        for car, stride, exits in self.lookup_cars:
+            index += (positions[car] + 1 if exits else positions[car]) * stride
+        distance = self.table[index]
+        return None if distance == self.UNREACHABLE else distance
+
+class RetrogradeTable:
+    """
+    RetrogradeTable holds the exact number of moves to the goal of every car arrangement reachable from a puzzle.
+    Arrangements are enumerated once by a forward pass from the initial state, then a backward breadth-first pass from
+    the goal arrangements (ambulance at the exit) labels each of them with its distance, so the distance and the
+    optimal next moves of any state of the puzzle are a lookup.
+    The table tells states apart by car positions only (fuel would multiply the state space by every fuel
+    combination), so distance is a lower bound (h8). It is exact when every car has the fuel for that many
+    slides, which is checked in constant time: exact_distance and next_moves answer UNKNOWN for the other states.
+    Arrangements are packed into integers (position_bits per car, enough for the longest line of the board)
+    and edges are stored in arrays of indices.
+    """
+
+    UNKNOWN = "unknown" # exact distance or next moves of a state whose fuel may bind
+
+    def __init__(self, bitboard, budget=None):
+        self.bitboard = bitboard
+        self.position_bits = (max(bitboard.width, bitboard.height) + 1).bit_length() # positions are stored + 1 (0 for a car that left)
+        self.index = {} # packed arrangement -> index in the table
+        self.distances = array('i') # distance to the goal of every arrangement (-1 if the goal cannot be reached)
+        self.closed_count = 0 # arrangements expanded by the forward pass (read by SearchBudget)
+        self.generated_count = 0 # moves found by the forward pass (read by SearchBudget)
+        self.reason = None # limit of the budget that stopped the forward pass
+        self.complete = self.build(budget)
+
+    # returns the integer packing the positions of the cars (removed cars are 0)
+    def pack(self, positions):
+        packed = 0
+        for position in reversed(positions):
+            packed = (packed << self.position_bits) | (position + 1)
+        return packed
+
+    """
+        Enumerates the arrangements reachable from the initial state and labels them with their distance to the goal.
+        Returns False if budget (a SearchBudget or None) stopped the forward pass before the end (nothing is labelled).
+    """
+    def build(self, budget=None):
+        bitboard = self.bitboard
+        full_fuel = sum(bitboard.fuel_mask << (car * bitboard.fuel_bits) for car in range(len(bitboard.cars)))
+        index = self.index
+        arrangements = [bitboard.initial_state[0]]
+        index[self.pack(arrangements[0])] = 0
+        sources, targets = array('I'), array('I') # moves of the forward pass
+        goals = array('I')
+
+        # forward pass: every arrangement reachable without running out of fuel (goals are not expanded)
+        for current, positions in enumerate(arrangements):
+            if budget is not None:
+                self.reason = budget.exceeded(self)
+                if self.reason is not None:
+                    return False
+            self.closed_count += 1
+            if bitboard.is_end((positions, full_fuel)):
+                goals.append(current)
+                continue
+            for _, _, _, child in bitboard.successors((positions, full_fuel)):
+                key = self.pack(child[0])
+                child_index = index.get(key)
+                if child_index is None:
+                    child_index = index[key] = len(arrangements)
+                    arrangements.append(child[0])
+                sources.append(current)
+                targets.append(child_index)
+        self.generated_count = len(targets)
+
+        # predecessors of every arrangement, grouped by arrangement (offsets[i]:offsets[i + 1] in predecessors)
+        offsets = array('I', [0]) * (len(arrangements) + 1)
+        for target in targets:
+            offsets[target + 1] += 1
+        for i in range(len(arrangements)):
+            offsets[i + 1] += offsets[i]
+        predecessors = array('I', [0]) * len(targets)
+        filled = offsets[:-1]
+        for source, target in zip(sources, targets):
+            predecessors[filled[target]] = source
+            filled[target] += 1
+
+        # backward pass: breadth-first from every goal arrangement
+        distances = self.distances = array('i', [-1]) * len(arrangements)
+        queue = deque(goals)
+        for goal in goals:
+            distances[goal] = 0
+        while queue:
+            current = queue.popleft()
+            distance = distances[current] + 1
+            for previous in predecessors[offsets[current]:offsets[current + 1]]:
+                if distances[previous] < 0:
+                    distances[previous] = distance
+                    queue.append(previous)
+        return True
+
+    # returns the distance to the goal of a state ignoring fuel, a lower bound (None if the goal cannot be reached or the state is not in the table)
+    def distance(self, state):
+        i = self.index.get(self.pack(state[0]))
+        if (i is None) or (self.distances[i] < 0): return None
+        return self.distances[i]
+
+    # checks if every car of a state has the fuel for distance slides, so fuel cannot bind on a path of distance moves
+    def has_fuel_for(self, state, distance):
+        return self.bitboard.has_more_fuel(state[1], self.bitboard.fuel_cap(distance))
+
+    """
+        Returns the exact number of moves to the goal of a state: None if the goal cannot be reached even ignoring
+        fuel (or the state is not in the table), UNKNOWN if fuel may bind on the way (the exact distance is longer
+        than the table distance, or there is no solution).
+    """
+    def exact_distance(self, state):
+        distance = self.distance(state)
+        if (distance is None) or self.has_fuel_for(state, distance): return distance
+        return self.UNKNOWN
+
+    """
+        Returns the (car index, action code, moves, state) moves of a state that lead one move closer to the goal
+        (an empty list at the goal or if the goal cannot be reached), or UNKNOWN if fuel may bind on the way.
+        A child one move closer still has the fuel for its distance, so following the first move of every state
+        walks an optimal solution.
+    """
+    def next_moves(self, state):
+        distance = self.exact_distance(state)
+        if distance == self.UNKNOWN: return self.UNKNOWN
+        if not distance: return []
+        return [move for move in self.bitboard.successors(state) if self.distance(move[3]) == distance - 1]
+
 class SearchNode:
     """
-    SearchNodes are the nodes used by UCSSearchTree to build a UCS search space for the puzzle.
+    SearchNodes are the nodes used by the search trees to build the search space for the puzzle.
+    Each node holds a BitBoard state (car positions and fuel, which identifies the node in open) and the move
+    that led to it: car is the index of the car in the BitBoard and action its code in RushHour.ACTIONS.
+    Nodes have __slots__ and only keep their children when the search tree is created with keep_children.
     """
-    def __init__(self, string_puzzle, board, fuel, parent, car, action, moves, g, h):
-        self.string_puzzle = string_puzzle
-        self.board = board
-        self.fuel = fuel
+    __slots__ = ('state', 'parent', 'children', 'car', 'action', 'moves', 'g', 'h', 'f')
+
+    def __init__(self, state, parent, car, action, moves, g, h):
+        self.state = state
         self.parent = parent
-        self.children = []
+        self.children = None
         self.car = car
         self.action = action
         self.moves = moves
@@ -244,629 +895,1643 @@ class SearchNode:
     def set_children(self, children):
         self.children = children
 
-class UCSSearchTree:
-
-    ACTIONS = ['up', 'right', 'down', 'left']
-
-    def __init__(self, initial_state, puzzle_number):
-        self.id = puzzle_number
-        self.puzzle = RushHour(initial_state) # create puzzle instance
-        self.root = SearchNode(self.puzzle.string_puzzle, self.puzzle.board, self.puzzle.fuel, None, None, None, None, 0, 0)  # set root node
-        self.open = [self.root] # list of open nodes
-        self.closed = [] # list of closed nodes
-        self.visited = [] # list of visited puzzle strings states (for easier search)
-        self.solution_path = [] # list of nodes in the solution path
-
+class OpenList:
     """
-    Searches for puzzle solution with the uniform cost search algorithm.
-    Writes solution (if any) to solution file and search path to search file.
-    Returns (as a list):
-        Length of the solution (0 if no solution)
-        Length of the Search Path
-        Execution Time
+    OpenList is the priority queue of open SearchNodes used by the search trees.
+    Nodes are kept in a binary heap ordered by (priority, insertion order) so ties are broken first-in first-out.
+    An index maps each state key to the node currently representing that state in the heap. Entries whose
+    node has been replaced in the index are stale and are discarded lazily when they reach the top of the heap.
+    """
+    def __init__(self, priority, nodes=()):
+        self.priority = priority # function returning the value a node is ordered by (f for UCS/A, h for GBFS)
+        self.heap = [] # heap of (priority, insertion order, node) entries
+        self.index = {} # state -> live node for that state
+        self.counter = count()
+        for node in nodes:
+            self.push(node)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    # returns the live open node for a state (None if state is not open)
+    def get(self, key):
+        return self.index.get(key)
+
+    # adds node to open, replacing any open node of the same state
+    def push(self, node):
+        self.index[node.state] = node
+        heappush(self.heap, (self.priority(node), next(self.counter), node))
+
+    # returns the priority of the node with the lowest priority (None if open is empty)
+    def peek(self):
+        while self.heap:
+            entry = self.heap[0]
+            if self.index.get(entry[2].state) is entry[2]:
+                return entry[0]
+            heappop(self.heap) # stale entry
+        return None
+
+    # removes and returns the node with the lowest priority (None if open is empty)
+    def pop(self):
+        while self.heap:
+            node = heappop(self.heap)[2]
+            if self.index.get(node.state) is node:
+                del self.index[node.state]
+                return node
+        return None
+
+class SearchResult(list):
+    """
+    SearchResult is the [solution length, search path length, execution time] list returned by the searches,
+    with the status of the search attached (solved, no solution or budget exceeded).
+    When a budget is exceeded the list holds the statistics of the search up to the cutoff.
     """
-    def uniform_cost_search(self, print_results):
-        # initialize output files
-        current_directory = os.path.dirname(os.path.realpath(__file__))
-        output_directory = "outputs"
-        search_filename = "ucs-search-" + str(self.id) + ".txt"
-        solution_filename = "ucs-sol-" + str(self.id) + ".txt"
-        search_file = None
-        solution_file = None
-        if print_results:
-            search_file = open(os.path.join(current_directory, output_directory, search_filename), "w")
-            solution_file = open(os.path.join(current_directory, output_directory, solution_filename), "w")
 
-        start = time.time()
-        execution_time = 0
+    SOLVED = "solved"
+    NO_SOLUTION = "no solution"
+    BUDGET_EXCEEDED = "budget exceeded"
 
-        while True:
-            if self.puzzle.is_end(self.open[0].board): # REACHED GOAL
-                if print_results:
-                    solution_file.write("Initial board configuration: " + self.puzzle.string_puzzle + "\n\n")
-                    solution_file.write(self.puzzle.stringify_board() + "\n")
-                    solution_file.write("Car fuel available: " + str(self.puzzle.fuel) + "\n")
-                execution_time = round(time.time() - start, 4)
-                current_node = self.open[0]
-                if print_results:
-                    solution_file.write(F'Runtime: {execution_time}s \n')
-                    search_file.write(str(current_node.f) + " " + str(current_node.g) + " " + str(current_node.h) + " " + current_node.string_puzzle)
-                
-                # compute solution path
-                while True:
-                    self.solution_path.append(current_node)
-                    if current_node.parent == None: break
-                    else: current_node = current_node.parent
-                self.solution_path.reverse()
-                self.solution_path.pop(0) # removes root node from solution path
-
-                # write solutions to file
-                if print_results:
-                    solution_file.write("Search path length: " + str(len(self.closed)) + " states\n")
-                    solution_file.write("Solution path length: " + str(len(self.solution_path)) + " moves\n")
-                    solution_file.write("Solution path: ")
-                    for node in self.solution_path:
-                        solution_file.write(node.car + " " + node.action + " " + str(node.moves) + "; ")
-                    solution_file.write("\n\n")
-                    for node in self.solution_path:
-                        solution_file.write(node.car + " " + node.action + " " + str(node.moves) + "             " + str(node.fuel[node.car]) + " " + node.string_puzzle + "\n")
-                    solution_file.write("\n")
-                    solution_file.write(self.puzzle.stringify_board(self.open[0].string_puzzle))
-                break
-            else:
-                # removes this node from the open list if list contains another similar state of lower or same cost
-                if self.has_lower_cost_in_open(self.open[0]) or self.open[0].string_puzzle in self.visited:
-                    self.open.pop(0)
-                    if len(self.open) == 0: # no solution can be found
-                        execution_time = round(time.time() - start, 4)
-                        if print_results: solution_file.write("no solution")
-                        break
-                    continue
+    def __init__(self, values, status, reason=None, stats=None):
+        super().__init__(values)
+        self.status = status
+        self.reason = reason # limit that stopped the search (when the budget was exceeded)
+        self.stats = stats # SearchStats of the search (when instrumented)
 
-                children = self.generate_all_children_ucs(self.open[0]) # generate all unvisited children
+    # returns the status as written to analysis.csv and to the solution file
+    def describe(self):
+        if self.reason is None: return self.status
+        return self.status + " (" + self.reason + ")"
 
-                # add children to visit to open
-                for child in children:
-                    self.open.append(child)
+class SearchBudget:
+    """
+    SearchBudget holds the optional limits of a search: maximum number of expansions, wall-clock time (in seconds)
+    and approximate memory (in bytes). Memory is estimated from the number of generated nodes and the size of a node.
+    Time and memory are only checked once CHECK_INTERVAL expansions have passed since the last check to keep the
+    check off the hot path (searches that close several nodes between calls still get checked).
+    """
 
-                # sort open by lowest f (same as g in this case)
-                self.open.sort(key=attrgetter('f'))
+    CHECK_INTERVAL = 64
+    ENTRY_BYTES = 150 # approximate bytes of the open heap entry and closed dict entry of a node
+
+    def __init__(self, max_expansions=None, max_time=None, max_memory=None):
+        self.max_expansions = max_expansions
+        self.max_time = max_time
+        self.max_memory = max_memory
+        self.deadline = None
+        self.node_size = 0
+        self.last_check = 0 # closed count of the search at the last time and memory check
+
+    # starts the clock of the budget and measures the size of a node
+    def start(self, node):
+        if self.max_time is not None: self.deadline = time.time() + self.max_time
+        self.last_check = 0
+        self.node_size = (sys.getsizeof(node) + sys.getsizeof(node.state)
+                          + sys.getsizeof(node.state[0]) + sys.getsizeof(node.state[1]) + self.ENTRY_BYTES)
+
+    # checks if the time limit of the budget has passed
+    def out_of_time(self):
+        return (self.deadline is not None) and (time.time() >= self.deadline)
+
+    # returns the name of the limit exceeded by a search tree (None if the search is within budget)
+    def exceeded(self, tree):
+        if (self.max_expansions is not None) and (tree.closed_count >= self.max_expansions):
+            return "max_expansions"
+        if not (0 <= tree.closed_count - self.last_check < self.CHECK_INTERVAL): # a new search may restart the count
+            self.last_check = tree.closed_count
+            if self.out_of_time():
+                return "max_time"
+            if (self.max_memory is not None) and (tree.generated_count * self.node_size >= self.max_memory):
+                return "max_memory"
+        return None
+
+class SearchStats:
+    """
+    SearchStats holds the counters of an instrumented search: nodes generated and expanded, duplicates dropped
+    because open held the state at a lower or same priority or because a closed state dominated it, peak size of
+    open, and time (in seconds) spent generating moves, evaluating the heuristic and maintaining open.
+    Searches only collect them when their tree is created with instrument (or an on_expand hook), so the
+    uninstrumented hot path only pays for a few "is None" checks.
+    """
 
-                # close current node
-                visited_node = self.open.pop(0)
-                self.closed.append(visited_node)
-                self.visited.append(visited_node.string_puzzle)
+    COLUMNS = ["Generated", "Expanded", "Open Duplicates", "Closed Duplicates", "Peak Open",
+               "Move Generation Time", "Heuristic Time", "Open Time"] # extra columns of analysis.csv
+
+    def __init__(self):
+        self.generated = 0
+        self.expanded = 0
+        self.open_duplicates = 0
+        self.closed_duplicates = 0
+        self.peak_open = 0
+        self.move_time = 0.0
+        self.heuristic_time = 0.0
+        self.open_time = 0.0
+
+    # returns function wrapped to add the time spent in it to counter (name of an attribute)
+    def timed(self, function, counter):
+        def timed_function(*args):
+            start = time.perf_counter()
+            result = function(*args)
+            setattr(self, counter, getattr(self, counter) + time.perf_counter() - start)
+            return result
+        return timed_function
+
+    # returns the values of the COLUMNS of a SearchStats (empty values if stats is None)
+    @classmethod
+    def row(cls, stats):
+        if stats is None: return [""] * len(cls.COLUMNS)
+        return [stats.generated, stats.expanded, stats.open_duplicates, stats.closed_duplicates, stats.peak_open,
+                round(stats.move_time, 4), round(stats.heuristic_time, 4), round(stats.open_time, 4)]
+
+class SuccessorCache:
+    """
+    SuccessorCache stores the successors of BitBoard states so the searches run on the same puzzle
+    (UCS, GBFS and Algorithm A with every heuristic) share move generation.
+    States are keyed with their fuel; the cache holds at most max_size states and evicts the least recently used.
+    """
 
-                # add searched node to search file
-                if print_results:
-                    current_search = str(visited_node.f) + " " + str(visited_node.g) + " " + str(visited_node.h) + " " + visited_node.string_puzzle
-                    search_file.write(current_search + "\n")
+    current = None # (puzzle, cache) of the last puzzle used with for_puzzle
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.entries = OrderedDict() # state -> tuple of (car index, action, moves, child state)
+        self.hits = 0
+        self.misses = 0
+
+    # returns the cache of a puzzle (puzzle fields), reusing the cache of the previous call for the same puzzle
+    @classmethod
+    def for_puzzle(cls, puzzle, max_size):
+        if (cls.current is None) or (cls.current[0] != puzzle) or (cls.current[1].max_size != max_size):
+            cls.current = (puzzle, cls(max_size))
+        return cls.current[1]
+
+    # returns the successors of a state, generating them with bitboard on a miss
+    def successors(self, bitboard, state):
+        successors = self.entries.get(state)
+        if successors is not None:
+            self.hits += 1
+            self.entries.move_to_end(state)
+            return successors
+        self.misses += 1
+        successors = tuple(bitboard.successors(state))
+        self.entries[state] = successors
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return successors
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+class TraceWriter:
+    """
+    TraceWriter is the buffered sink of the search and solution files.
+    Writes are collected in memory and handed in batches to a background thread that does the file I/O
+    (and gzip compression when compress is set, in which case ".gz" is added to the file name).
+    With sample = N, only every Nth call to sample_next returns True, so the search loop skips the other lines.
+    Without sampling the bytes written are the same as writing directly to the file.
+    """
 
-                if len(self.open) == 0: # no solution can be found
-                    execution_time = round(time.time() - start, 4)
-                    if print_results: solution_file.write("no solution")
-                    break
-        if print_results:
-            search_file.close()
-            solution_file.close() 
-        return [len(self.solution_path), len(self.closed), execution_time]
+    BATCH_SIZE = 512 # writes collected before handing a batch to the writer thread
+    QUEUE_SIZE = 64 # batches waiting for the writer thread before write blocks
+
+    def __init__(self, path, compress=False, sample=1):
+        self.file = gzip.open(path + ".gz", "wt") if compress else open(path, "w")
+        self.sample = sample
+        self.sample_counter = 0
+        self.buffer = []
+        self.error = None # exception raised in the writer thread
+        self.queue = Queue(self.QUEUE_SIZE)
+        self.thread = Thread(target=self.write_batches, daemon=True)
+        self.thread.start()
+
+    # writer thread: writes batches until the None sentinel
+    def write_batches(self):
+        while True:
+            batch = self.queue.get()
+            if batch is None: break
+            if self.error is None:
+                try:
+                    self.file.write(batch)
+                except Exception as e:
+                    self.error = e
+
+    # checks if the next sampled line should be written
+    def sample_next(self):
+        self.sample_counter += 1
+        return self.sample <= 1 or self.sample_counter % self.sample == 1
+
+    def write(self, text):
+        self.buffer.append(text)
+        if len(self.buffer) >= self.BATCH_SIZE:
+            self.queue.put("".join(self.buffer))
+            self.buffer = []
+
+    # flushes pending writes, stops the writer thread and closes the file
+    def close(self):
+        if self.buffer:
+            self.queue.put("".join(self.buffer))
+            self.buffer = []
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        if self.error is not None: raise self.error
+
+class SearchTree:
+    """
+    SearchTree is the best-first search engine shared by UCSSearchTree, GBFSSearchTree and AlgorithmASearchTree.
+    The order in which open nodes are expanded is given by a priority function of the node (g, h, f = g + h or a
+    weighted f), so the three algorithms only differ in the priority and heuristic they pass to best_first_search.
+    """
 
-    def generate_all_children_ucs(self, node: SearchNode):
-        children = []
-        for car in self.puzzle.cars:
-            for action in self.ACTIONS:
-                move_counter = 1
-                while True:
-                    child = self.puzzle.preview_action(car, action, move_counter, node.fuel, node.board)
-                    if child == None: break # changes action for car if move is not valid
-                    # adds new children (cost is always +1 no matter the distance)
-                    # no heuristic in ucs (h = 0)
-                    child_node = SearchNode(child[0], child[1], child[2], node, car, action, move_counter, (node.g + 1), 0)
-
-                    is_parent_node = (child_node.string_puzzle == node.string_puzzle)
-                    has_been_visited = (child_node.string_puzzle in self.visited)
-                    if ((not is_parent_node) and # do not append parent
-                        (not has_been_visited)): # has not already been visited
-                        children.append(child_node) 
-                    move_counter += 1
-        node.set_children(children)
-        return children
-    
-    def has_lower_cost_in_open(self, node: SearchNode):
-        skip_first = True
-        for open_node in self.open:
-            # skips the first place (since this method is called from the first node in open always)
-            # don't want to compare it to itself
-            if skip_first:
-                skip_first = False
-                continue
-            if (open_node.string_puzzle == node.string_puzzle) and (open_node.f <= node.f):
-                return True
-        return False
-    
-    def run(self, print_results):
-        return self.uniform_cost_search(print_results)
+    ACTIONS = ['up', 'right', 'down', 'left']
 
-class GBFSSearchTree:
+    UNSOLVABLE = float('inf') # heuristic value of a state from which the goal cannot be reached (never added to open)
+    HEURISTICS = (1, 2, 3, 4, 5, 6, 7, 8) # numbers of the heuristics of self.heuristics
+    ADMISSIBLE_HEURISTICS = (1, 5, 6, 7, 8) # never above the number of moves left (h2 to h4 may be)
+    CONSISTENT_HEURISTICS = (1, 7, 8) # admissible and dropping by at most 1 per move (not shown for h5 and h6)
 
-    ACTIONS = ['up', 'right', 'down', 'left']
+    # priority functions ordering open
+    PRIORITY_G = attrgetter('g')
+    PRIORITY_H = attrgetter('h')
+    PRIORITY_F = attrgetter('f')
 
-    def __init__(self, initial_state, puzzle_number):
+    BATCH_SIZE = 256 # maximum number of nodes expanded together in vectorized mode
+
+    def __init__(self, initial_state, puzzle_number, trace=False, compress_output=False, search_sample=1, successor_cache=None, vectorized=False, keep_children=False, instrument=False, on_expand=None):
         self.id = puzzle_number
+        self.successor_cache = successor_cache # SuccessorCache shared with other searches on the puzzle (None to disable)
+        self.trace = trace # keep closed nodes in self.closed (off by default to save memory)
+        self.keep_children = keep_children # keep the children of expanded nodes in node.children (for debugging or visualization)
+        self.instrument = instrument # collect SearchStats in self.stats and in the results
+        self.on_expand = on_expand # hook called as on_expand(tree, node, stats) after every expansion (for profilers)
+        self.stats = None # SearchStats of the running search (None when not instrumented)
+        self.compress_output = compress_output # gzip the search and solution files
+        self.search_sample = search_sample # write only every Nth expansion to the search file
         self.puzzle = RushHour(initial_state) # create puzzle instance
-        self.root = SearchNode(self.puzzle.string_puzzle, self.puzzle.board, self.puzzle.fuel, None, None, None, None, 0, 0)  # set root node
-        self.open = [self.root] # list of open nodes
-        self.closed = [] # list of closed nodes
-        self.visited = [] # list of visited puzzle strings states (for easier search)
+        self.root = SearchNode(self.puzzle.bitboard.initial_state, None, None, None, None, 0, 0)  # set root node
+        self.open = OpenList(self.PRIORITY_F, [self.root]) # priority queue of open nodes
+        self.closed = [] # list of closed nodes (only filled when tracing)
+        self.closed_count = 0 # number of nodes closed (length of the search path)
+        self.generated_count = 0 # number of nodes generated
+        self.visited = {} # closed layouts (car positions) -> [(packed fuel, g)] of the closed states, none dominating another
         self.solution_path = [] # list of nodes in the solution path
+        self.reopen = False # reopen closed states reached again at a lower cost (set by best_first_search)
+        self.horizon = None # moves of the longest solution worth finding, if known (caps the fuel compared in closed)
+        self.expander = None # VectorizedExpander generating and scoring children (vectorized mode only)
+        self.batching = False # expand the open nodes of equal priority in batches (set by best_first_search)
+        if vectorized and VectorizedExpander.is_available(self.puzzle.bitboard):
+            self.expander = VectorizedExpander(self.puzzle.bitboard)
+        self.heuristics = {1: self.h1_blocked_vehicles,
+                           2: self.h2_blocked_positions,
+                           3: self.h3_multiplier_blocked_vehicles,
+                           4: self.h4_open_positions,
+                           5: self.h5_blocker_graph,
+                           6: self.h6_blocker_graph_dead_ends,
+                           7: self.h7_pattern_database,
+                           8: self.h8_retrograde}
+        self.pattern_database = None # PatternDatabase of the puzzle (opened on first use of h7)
+        self.retrograde_table = None # RetrogradeTable of the puzzle (built on first use of h8)
+        self.budget = None # SearchBudget of the running search (also limits the tables built by h7 and h8)
+
+    # returns a priority function ordering open by g + weight * h
+    @staticmethod
+    def weighted_priority(weight):
+        return lambda node: node.g + weight * node.h
 
     """
-    Searches for puzzle solution with the GBFS search.
-    Writes solution (if any) to solution file and search path to search file.
-    Returns (as a list):
+    Searches for puzzle solution expanding open nodes in order of lowest priority.
+    Writes solution (if any) to solution file and search path to search file (named after output_name).
+    The search stops early when an optional SearchBudget is exceeded.
+    When the tree is instrumented, the SearchStats of the search are attached to the result.
+    Returns (as a SearchResult list):
         Length of the solution (0 if no solution)
         Length of the Search Path
         Execution Time
-        Cost of solution (None if no solution)
     """
-    
-    def GBFS(self, heuristic, print_results):
+    def best_first_search(self, priority, heuristic, output_name, print_results, reopen=False, budget=None):
+        self.open = OpenList(priority, [self.root])
+        self.reopen = reopen
+        # batches keep the per-node expansion order only if no child can have a lower priority than its parent
+        self.batching = (self.expander is not None) and ((priority is self.PRIORITY_G) or
+                                                         ((priority is self.PRIORITY_F) and ((heuristic is None) or (heuristic in self.CONSISTENT_HEURISTICS))))
+        stats = self.stats = SearchStats() if (self.instrument or self.on_expand is not None) else None
+        status = SearchResult.NO_SOLUTION
+        reason = None
+
         # initialize output files
         current_directory = os.path.dirname(os.path.realpath(__file__))
         output_directory = "outputs"
-        search_filename = "GBFS-h" + str(heuristic) + "-search-" + str(self.id) + ".txt"
-        solution_filename = "GBFS-h" + str(heuristic) + "-sol-" + str(self.id) + ".txt"
+        search_filename = output_name + "-search-" + str(self.id) + ".txt"
+        solution_filename = output_name + "-sol-" + str(self.id) + ".txt"
         search_file = None
         solution_file = None
         if print_results:
-            search_file = open(os.path.join(current_directory, output_directory, search_filename), "w")
-            solution_file = open(os.path.join(current_directory, output_directory, solution_filename), "w")
+            search_file = TraceWriter(os.path.join(current_directory, output_directory, search_filename), self.compress_output, self.search_sample)
+            solution_file = TraceWriter(os.path.join(current_directory, output_directory, solution_filename), self.compress_output)
 
         start = time.time()
         execution_time = 0
+        if budget is not None: budget.start(self.root)
+        self.budget = budget
 
+        is_end = self.puzzle.bitboard.is_end
         while True:
-            if self.puzzle.is_end(self.open[0].board): # REACHED GOAL
-                if print_results:
-                    solution_file.write("Initial board configuration: " + self.puzzle.string_puzzle + "\n\n")
-                    solution_file.write(self.puzzle.stringify_board() + "\n")
-                    solution_file.write("Car fuel available: " + str(self.puzzle.fuel) + "\n")
+            if budget is not None:
+                reason = budget.exceeded(self)
+                if reason is not None: # stop the search at the limit
+                    status = SearchResult.BUDGET_EXCEEDED
+                    execution_time = round(time.time() - start, 4)
+                    if print_results: solution_file.write(SearchResult([], status, reason).describe())
+                    break
+
+            if stats is not None: open_start = time.perf_counter()
+            batch = self.pop_batch() # node(s) with the lowest priority in open
+            if stats is not None: stats.open_time += time.perf_counter() - open_start
+            if not batch: # no solution can be found
                 execution_time = round(time.time() - start, 4)
-                current_node = self.open[0]
-                if print_results:
-                    solution_file.write(F'Runtime: {execution_time}s \n')
-                    search_file.write(str(current_node.f) + " " + str(current_node.g) + " " + str(current_node.h) + " " + current_node.string_puzzle)
-                
-                # compute solution path
-                while True:
-                    self.solution_path.append(current_node)
-                    if current_node.parent == None: break
-                    else: current_node = current_node.parent
-                self.solution_path.reverse()
-                self.solution_path.pop(0) # removes root node from solution path
-                
-
-                # write solutions to file
-                if print_results:
-                    solution_file.write("Search path length: " + str(len(self.closed)) + " states\n")
-                    solution_file.write("Solution path length: " + str(len(self.solution_path)) + " moves\n")
-                    solution_file.write("Solution path: ")
-                    for node in self.solution_path:
-                        solution_file.write(node.car + " " + node.action + " " + str(node.moves) + "; ")
-                    solution_file.write("\n\n")
-                    for node in self.solution_path:
-                        solution_file.write(node.car + " " + node.action + " " + str(node.moves) + "             " + str(node.fuel[node.car]) + " " + node.string_puzzle + "\n")
-                    solution_file.write("\n")
-                    solution_file.write(self.puzzle.stringify_board(self.open[0].string_puzzle))
+                if print_results: solution_file.write("no solution")
                 break
-            else:
-                # removes this node from the open list if list contains another similar state of lower or same cost
-                if self.is_in_open_GBFS(self.open[0]) or (self.open[0].string_puzzle in self.visited):
-                    self.open.pop(0)
-                    if len(self.open) == 0: # no solution can be found
-                        execution_time = round(time.time() - start, 4)
-                        if print_results: solution_file.write("no solution")
-                        break
-                    continue
-
-                children = self.generate_all_children_GBFS(self.open[0], heuristic) # generate all unvisited children
-
-                # add children to visit to open
-                for child in children:
-                    self.open.append(child)
 
-                # sort open by lowest h 
-                self.open.sort(key=attrgetter('h'))
+            goal_node = None
+            expanded_nodes = []
+            batch_closed = {} # closed states of the batch nodes expanded before the current one
+            for current_node in batch:
+                if is_end(current_node.state): # REACHED GOAL (the nodes popped before it are expanded first)
+                    goal_node = current_node
+                    break
+                # skip states already closed through another path or by an earlier node of the batch (same layout, more fuel)
+                if not (self.is_closed(current_node) or (batch_closed and self.is_closed(current_node, batch_closed))):
+                    expanded_nodes.append(current_node)
+                    if len(batch) > 1: self.close(current_node, batch_closed)
+                elif stats is not None:
+                    stats.closed_duplicates += 1
+
+            for current_node, children in zip(expanded_nodes, self.generate_children(expanded_nodes, heuristic)):
+                # add children to open unless open already holds the same state at a lower or same priority
+                self.generated_count += len(children)
+                if stats is not None:
+                    open_start = time.perf_counter()
+                    for child in children:
+                        if not self.has_lower_cost_in_open(child):
+                            self.open.push(child)
+                        else:
+                            stats.open_duplicates += 1
+                    stats.open_time += time.perf_counter() - open_start
+                    stats.peak_open = max(stats.peak_open, len(self.open))
+                else:
+                    for child in children:
+                        if not self.has_lower_cost_in_open(child):
+                            self.open.push(child)
 
                 # close current node
-                visited_node = self.open.pop(0)
-                self.closed.append(visited_node)
-                self.visited.append(visited_node.string_puzzle)
+                self.close(current_node)
+                self.closed_count += 1
+                if self.trace: self.closed.append(current_node)
 
                 # add searched node to search file
-                if print_results:
-                    current_search = str(visited_node.f) + " " + str(visited_node.g) + " " + str(visited_node.h) + " " + visited_node.string_puzzle
-                    search_file.write(current_search + "\n")
+                if print_results and search_file.sample_next():
+                    search_file.write(self.format_search_node(current_node) + "\n")
+                if self.on_expand is not None:
+                    self.on_expand(self, current_node, stats)
 
-                if len(self.open) == 0: # no solution can be found
-                    execution_time = round(time.time() - start, 4)
-                    if print_results: solution_file.write("no solution")
-                    break
+            if goal_node is not None:
+                status = SearchResult.SOLVED
+                execution_time = round(time.time() - start, 4)
+                self.solution_path = self.get_solution_path(goal_node)
+                if print_results:
+                    search_file.write(self.format_search_node(goal_node))
+                    self.write_solution(solution_file, goal_node, execution_time)
+                break
         if print_results:
             search_file.close()
             solution_file.close() 
-        return [len(self.solution_path), len(self.closed), execution_time]
+        if stats is not None:
+            stats.generated = self.generated_count
+            stats.expanded = self.closed_count
+        return SearchResult([len(self.solution_path), self.closed_count, execution_time], status, reason, stats)
+
+    """
+        Removes the next nodes to expand from open: the node with the lowest priority and, when batching (vectorized
+        UCS, or Algorithm A with a consistent heuristic), the nodes of the same priority that follow it (up to
+        BATCH_SIZE), so they are expanded in one batch. Their children come after them in open either way (first-in
+        first-out ties), so the nodes are expanded in the same order as one at a time.
+        Returns an empty list if open is empty.
+    """
+    def pop_batch(self):
+        node = self.open.pop()
+        if node is None: return []
+        batch = [node]
+        if self.batching:
+            priority = self.open.priority(node)
+            while (len(batch) < self.BATCH_SIZE) and (self.open.peek() == priority):
+                batch.append(self.open.pop())
+        return batch
+
+    # returns the line of the search file for a node
+    def format_search_node(self, node: SearchNode):
+        return str(node.f) + " " + str(node.g) + " " + str(node.h) + " " + self.puzzle.bitboard.to_string(node.state)
+
+    # returns the nodes from the root (excluded) to node
+    def get_solution_path(self, node: SearchNode):
+        solution_path = []
+        while node.parent is not None:
+            solution_path.append(node)
+            node = node.parent
+        solution_path.reverse()
+        return solution_path
+
+    # returns the move of a node as written in the solution file ("car action moves")
+    def format_move(self, node: SearchNode):
+        return self.puzzle.bitboard.cars[node.car] + " " + RushHour.ACTIONS[node.action] + " " + str(node.moves)
+
+    # returns the (car, action, moves) of every move of the solution path
+    def solution_moves(self):
+        return [(self.puzzle.bitboard.cars[node.car], RushHour.ACTIONS[node.action], node.moves) for node in self.solution_path]
+
+    # returns (car, action, moves) moves as written in the solution file ("car action moves; " for every move)
+    @staticmethod
+    def format_moves(moves):
+        return "".join(car + " " + action + " " + str(car_moves) + "; " for car, action, car_moves in moves)
+
+    # returns the moves of the solution path as written in the solution file
+    def format_solution_moves(self):
+        return self.format_moves(self.solution_moves())
+
+    # writes the solution found at goal_node to solution file
+    def write_solution(self, solution_file, goal_node: SearchNode, execution_time):
+        bitboard = self.puzzle.bitboard
+        solution_file.write("Initial board configuration: " + self.puzzle.string_puzzle + "\n\n")
+        solution_file.write(self.puzzle.stringify_board() + "\n")
+        solution_file.write("Car fuel available: " + str(self.puzzle.fuel) + "\n")
+        solution_file.write(F'Runtime: {execution_time}s \n')
+        solution_file.write("Search path length: " + str(self.closed_count) + " states\n")
+        solution_file.write("Solution path length: " + str(len(self.solution_path)) + " moves\n")
+        solution_file.write("Solution path: " + self.format_solution_moves() + "\n\n")
+        for node in self.solution_path:
+            solution_file.write(self.format_move(node) + "             " + str(bitboard.fuel_of(node.state, node.car)) + " " + bitboard.to_string(node.state) + "\n")
+        solution_file.write("\n")
+        solution_file.write(self.puzzle.stringify_board(bitboard.to_string(goal_node.state)))
+
+    """
+        Yields the list of unvisited children of every node. Lists are built lazily, so the children of a node are
+        filtered against the nodes of the batch closed before it.
+    """
+    def generate_children(self, nodes, heuristic=None):
+        if (self.expander is not None) and (len(nodes) > 1): # a single node is cheaper to expand on its own
+            yield from self.generate_all_children_vectorized(nodes, heuristic)
+        else:
+            for node in nodes:
+                yield self.generate_all_children(node, heuristic)
 
-    def generate_all_children_GBFS(self, node: SearchNode, heuristic):
+    # returns all unvisited children of a node (h is 0 when no heuristic is given)
+    def generate_all_children(self, node: SearchNode, heuristic=None):
         children = []
-        for car in self.puzzle.cars:
-            for action in self.ACTIONS:
-                move_counter = 1
-                while True:
-                    child = self.puzzle.preview_action(car, action, move_counter, node.fuel, node.board)
-                    if child == None: break # changes action for car if move is not valid
-                    # adds new children (cost is always +1 no matter the distance)
-                    # no heuristic in ucs (h = 0)
-                    child_node = SearchNode(child[0], child[1], child[2], node, car, action, move_counter, (node.g + 1), 0) 
-
-                    # calculating h value
-                    h_value = 0
-                    if heuristic == 1:
-                        h_value = self.h1_blocked_vehicles(child_node)
-                    elif heuristic == 2:
-                        h_value = self.h2_blocked_positions(child_node)
-                    elif heuristic == 3:
-                        h_value = self.h3_multiplier_blocked_vehicles(child_node)
-                    elif heuristic == 4:
-                        h_value = self.h4_open_positions(child_node)
-                    child_node.set_h(h_value)
-
-                    is_parent_node = (child_node.string_puzzle == node.string_puzzle)
-                    has_been_visited = (child_node.string_puzzle in self.visited)
-                    if ((not is_parent_node) and # do not append parent
-                        (not has_been_visited)): # has not already been visited
-                        children.append(child_node) 
-                    move_counter += 1
-        node.set_children(children)
+        stats = self.stats
+        evaluate = self.heuristics.get(heuristic)
+        bitboard = self.puzzle.bitboard
+        if self.successor_cache is not None:
+            generate = lambda state: self.successor_cache.successors(bitboard, state)
+        else:
+            generate = bitboard.successors
+        if stats is not None:
+            generate = stats.timed(lambda state, generate=generate: tuple(generate(state)), "move_time") # includes the cache lookup
+            if evaluate is not None: evaluate = stats.timed(evaluate, "heuristic_time")
+        successors = generate(node.state)
+        for car_index, action, moves, child in successors:
+            # adds new children (cost is always +1 no matter the distance)
+            child_node = SearchNode(child, node, car_index, action, moves, (node.g + 1), 0)
+            if evaluate is not None:
+                child_node.set_h(evaluate(child_node))
+
+            is_parent_node = (child_node.state[0] == node.state[0])
+            has_been_visited = self.is_closed(child_node)
+            if ((not is_parent_node) and # do not append parent
+                (not has_been_visited) and # has not already been visited
+                (child_node.h != self.UNSOLVABLE)): # goal can still be reached
+                children.append(child_node)
+            elif (stats is not None) and has_been_visited:
+                stats.closed_duplicates += 1
+        if self.keep_children: node.set_children(children)
         return children
 
-    def is_in_open_GBFS(self, node: SearchNode):
-        skip_first = True
-        for open_node in self.open:
-            # skips the first place (since this method is called from the first node in open always)
-            # don't want to compare it to itself
-            if skip_first:
-                skip_first = False
-                continue
-            if (open_node.string_puzzle == node.string_puzzle):
+    # yields the unvisited children of every node, generated and scored in one batch by the VectorizedExpander
+    def generate_all_children_vectorized(self, nodes, heuristic=None):
+        bitboard = self.puzzle.bitboard
+        stats = self.stats
+        expand, score, evaluate = self.expander.expand, self.expander.score, self.heuristics.get(heuristic)
+        if stats is not None:
+            expand = stats.timed(expand, "move_time")
+            score = stats.timed(score, "heuristic_time")
+            if evaluate is not None: evaluate = stats.timed(evaluate, "heuristic_time")
+        parents, cars, actions, moves, positions = expand([node.state for node in nodes])
+        scores = None
+        if heuristic in self.expander.HEURISTICS:
+            scores = score(positions, heuristic).tolist()
+        ends = np.cumsum(np.bincount(parents, minlength=len(nodes))).tolist() # end of the children of every node
+        cars, actions, moves, positions = cars.tolist(), actions.tolist(), moves.tolist(), positions.tolist()
+
+        start = 0
+        for node, end in zip(nodes, ends):
+            children = []
+            for i in range(start, end):
+                car, car_moves = cars[i], moves[i]
+                child = (tuple(positions[i]), node.state[1] - (car_moves << (car * bitboard.fuel_bits)))
+                child_node = SearchNode(child, node, car, actions[i], car_moves, (node.g + 1), 0)
+                if scores is not None:
+                    child_node.set_h(scores[i])
+                elif evaluate is not None: # heuristic without a vectorized version
+                    child_node.set_h(evaluate(child_node))
+                if child_node.state[0] == node.state[0] or child_node.h == self.UNSOLVABLE:
+                    continue
+                if not self.is_closed(child_node):
+                    children.append(child_node)
+                elif stats is not None:
+                    stats.closed_duplicates += 1
+            if self.keep_children: node.set_children(children)
+            start = end
+            yield children
+
+    """
+        Checks if a closed state dominates the node: same layout and at least as much fuel for every car
+        (at a lower or same cost g when reopening is allowed). A dominated state cannot lead to a better solution.
+    """
+    def is_closed(self, node: SearchNode, visited=None):
+        closed = (self.visited if visited is None else visited).get(node.state[0])
+        if closed is None: return False
+        fuel = self.closed_fuel(node)
+        has_more_fuel = self.puzzle.bitboard.has_more_fuel
+        for closed_fuel, closed_g in closed:
+            if has_more_fuel(closed_fuel, fuel) and ((not self.reopen) or (closed_g <= node.g)):
                 return True
         return False
-    
+
+    # adds a node to closed (or to the visited dict given), dropping the closed states of its layout it dominates
+    def close(self, node: SearchNode, visited=None):
+        if visited is None: visited = self.visited
+        layout, fuel = node.state[0], self.closed_fuel(node)
+        closed = visited.get(layout)
+        if closed is None:
+            visited[layout] = [(fuel, node.g)]
+            return
+        has_more_fuel = self.puzzle.bitboard.has_more_fuel
+        closed[:] = [(closed_fuel, closed_g) for closed_fuel, closed_g in closed
+                     if not (has_more_fuel(fuel, closed_fuel) and ((not self.reopen) or (node.g <= closed_g)))]
+        closed.append((fuel, node.g))
+
+    """
+        Returns the fuel of a node as compared in closed. When reopening with a move horizon (no solution worth
+        finding is longer than horizon moves), fuel beyond what a car can use in the horizon - g moves left is capped,
+        since it can no longer bind: states whose fuel only differs there dominate each other.
+    """
+    def closed_fuel(self, node: SearchNode):
+        if (self.horizon is None) or (not self.reopen):
+            return node.state[1]
+        bitboard = self.puzzle.bitboard
+        return bitboard.clamp_fuel(node.state[1], bitboard.fuel_cap(max(0, self.horizon - node.g)))
+
+    # checks if open contains the same state at a lower or same priority
+    def has_lower_cost_in_open(self, node: SearchNode):
+        open_node = self.open.get(node.state)
+        return (open_node is not None) and (self.open.priority(open_node) <= self.open.priority(node))
+
     def h1_blocked_vehicles(self, node: SearchNode):
-        a_coordinates = self.puzzle.get_car_coordinates('A', node.board) # get coordinates of Ambulance (A)
-        max_a_coordinate = max(a_coordinates,key=itemgetter(0))[0] # A's highest x-coordinate value
-        blocked_pointer = max_a_coordinate + 1 # set pointer to right of max coordinate of A
-        blocked_cars = [] # initialize empty list of blocked cars
-        
-        for x in range(blocked_pointer, 6):
-            position = node.board[x][2]
-            if (position not in blocked_cars) and (position != "."): 
-                blocked_cars.append(position)
-        return len(blocked_cars)
+        blocked_region = self.puzzle.bitboard.blocked_region(node.state) # cells of the exit row to the right of A
+        return sum(1 for mask in self.puzzle.bitboard.masks(node.state) if mask & blocked_region) # number of cars in the region
 
     def h2_blocked_positions(self, node: SearchNode):
-        a_coordinates = self.puzzle.get_car_coordinates('A', node.board) # get coordinates of Ambulance (A)
-        max_a_coordinate = max(a_coordinates,key=itemgetter(0))[0] # A's highest x-coordinate value
-        blocked_pointer = max_a_coordinate + 1 # set pointer to right of max coordinate of A
-        blocked_positions = [] # initialize empty list of blocked positions
-        
-        for x in range(blocked_pointer, 6):
-            position = node.board[x][2]
-            if (position != "."): 
-                blocked_positions.append(position)
-        return len(blocked_positions)
+        blocked_region = self.puzzle.bitboard.blocked_region(node.state) # cells of the exit row to the right of A
+        return bin(self.puzzle.bitboard.occupancy(node.state) & blocked_region).count("1") # number of occupied cells in the region
     
     def h3_multiplier_blocked_vehicles(self, node: SearchNode):
-        a_coordinates = self.puzzle.get_car_coordinates('A', node.board) # get coordinates of Ambulance (A)
-        max_a_coordinate = max(a_coordinates,key=itemgetter(0))[0] # A's highest x-coordinate value
-        blocked_pointer = max_a_coordinate + 1 # set pointer to right of max coordinate of A
-        blocked_cars = [] # initialize empty list of blocked cars
-        
-        for x in range(blocked_pointer, 6):
-            position = node.board[x][2]
-            if (position not in blocked_cars) and (position != "."): 
-                blocked_cars.append(position)
-        return 2 * len(blocked_cars)
+        blocked_region = self.puzzle.bitboard.blocked_region(node.state) # cells of the exit row to the right of A
+        return 2 * sum(1 for mask in self.puzzle.bitboard.masks(node.state) if mask & blocked_region)
 
     def h4_open_positions(self, node: SearchNode):
-            a_coordinates = self.puzzle.get_car_coordinates('A', node.board) # get coordinates of Ambulance (A)
-            max_a_coordinate = max(a_coordinates,key=itemgetter(0))[0] # A's highest x-coordinate value
-            blocked_pointer = max_a_coordinate + 1 # set pointer to right of max coordinate of A
-            open_counter = 0
-            for x in range(blocked_pointer, 6):
-                position = node.board[x][2]
-                if (position == "."): open_counter += 1
-            return open_counter
+        blocked_region = self.puzzle.bitboard.blocked_region(node.state) # cells of the exit row to the right of A
+        return bin(blocked_region & ~self.puzzle.bitboard.occupancy(node.state)).count("1") # number of free cells in the region
+
+    # admissible: moves of A and of every blocker, plus blockers that need another car to move first
+    def h5_blocker_graph(self, node: SearchNode):
+        return self.puzzle.bitboard.blocker_graph(node.state)[0]
+
+    # h5, and prunes states where A or a blocker does not have the fuel or room to get out of the way
+    def h6_blocker_graph_dead_ends(self, node: SearchNode):
+        bound, dead = self.puzzle.bitboard.blocker_graph(node.state)
+        return self.UNSOLVABLE if dead else bound
+
+    # admissible: exact distance of the ambulance and the cars touching the exit row, without the other cars and fuel
+    def h7_pattern_database(self, node: SearchNode):
+        if self.pattern_database is None:
+            self.pattern_database = PatternDatabase(self.puzzle, self.budget)
+        if not self.pattern_database.complete: # out of time: the search stops at its next budget check
+            return 0
+        distance = self.pattern_database.lookup(node.state)
+        return self.UNSOLVABLE if distance is None else distance
+
+    # admissible: exact distance of the car arrangement (fuel ignored) from the RetrogradeTable of the puzzle
+    def h8_retrograde(self, node: SearchNode):
+        if self.retrograde_table is None:
+            self.retrograde_table = RetrogradeTable(self.puzzle.bitboard, self.budget)
+        if not self.retrograde_table.complete: # stopped by the budget: the search stops at its next budget check
+            return 0
+        distance = self.retrograde_table.distance(node.state)
+        return self.UNSOLVABLE if distance is None else distance
 
     def __reset__(self):
-        self.open = [self.root]
+        self.open = OpenList(self.PRIORITY_F, [self.root])
         self.closed = []
-        self.visited = []
+        self.closed_count = 0
+        self.generated_count = 0
+        self.visited = {}
         self.solution_path = []
 
-    def run_GBFS(self, heuristic, print_results):
-        results = self.GBFS(heuristic, print_results)
+class UCSSearchTree(SearchTree):
+
+    """
+    Searches for puzzle solution with the uniform cost search algorithm (open ordered by g).
+    Returns the same list as SearchTree.best_first_search.
+    """
+    def uniform_cost_search(self, print_results, budget=None):
+        return self.best_first_search(self.PRIORITY_G, None, "ucs", print_results, budget=budget)
+
+    def run(self, print_results, budget=None):
+        results = self.uniform_cost_search(print_results, budget)
         self.__reset__()
         return results
 
-class AlgorithmASearchTree:
+class GBFSSearchTree(SearchTree):
 
-    ACTIONS = ['up', 'right', 'down', 'left']
+    """
+    Searches for puzzle solution with the GBFS search (open ordered by h).
+    Returns the same list as SearchTree.best_first_search.
+    """
+    def GBFS(self, heuristic, print_results, budget=None):
+        return self.best_first_search(self.PRIORITY_H, heuristic, "GBFS-h" + str(heuristic), print_results, budget=budget)
 
-    def __init__(self, initial_state, puzzle_number):
-        self.id = puzzle_number
-        self.puzzle = RushHour(initial_state) # create puzzle instance
-        self.root = SearchNode(self.puzzle.string_puzzle, self.puzzle.board, self.puzzle.fuel, None, None, None, None, 0, 0)  # set root node
-        self.open = [self.root] # list of open nodes
-        self.closed = [] # list of closed nodes
-        self.visited = [] # list of visited puzzle strings states (for easier search)
-        self.solution_path = [] # list of nodes in the solution path
+    def run_GBFS(self, heuristic, print_results, budget=None):
+        results = self.GBFS(heuristic, print_results, budget)
+        self.__reset__()
+        return results
 
+class AlgorithmASearchTree(SearchTree):
     """
-    Searches for puzzle solution with the Algorithm A/A* search.
-    Writes solution (if any) to solution file and search path to search file.
-    Returns (as a list):
-        Length of the solution (0 if no solution)
-        Length of the Search Path
-        Execution Time
+    AlgorithmASearchTree searches for the puzzle solution with Algorithm A/A* on one core, or with a hash-distributed
+    parallel A* on search_workers processes (see parallel_algorithm_A).
     """
-    
-    def algorithm_A(self, heuristic, print_results):
-        # initialize output files
 
+    POLL_INTERVAL = 0.005 # seconds an idle worker of the parallel search waits for children before checking termination
+    EXPANSION_BATCH = 16 # expansions of a worker of the parallel search between two exchanges of children
+    RESULTS_POLL_INTERVAL = 0.1 # seconds the parallel search waits for a message before checking its workers are alive
+
+    def __init__(self, *args, search_workers=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.search_workers = search_workers
+
+    """
+    Searches for puzzle solution with the Algorithm A/A* search (open ordered by f = g + h), in parallel
+    when workers (default: search_workers) is more than 1.
+    Returns the same list as SearchTree.best_first_search.
+    """
+    def algorithm_A(self, heuristic, print_results, reopen=False, budget=None, workers=None):
+        workers = self.search_workers if workers is None else workers
+        if workers > 1:
+            return self.parallel_algorithm_A(heuristic, print_results, budget, workers)
+        return self.best_first_search(self.PRIORITY_F, heuristic, "a-h" + str(heuristic), print_results, reopen, budget)
+
+    def run_algorithm_A(self, heuristic, print_results, reopen=False, budget=None, workers=None):
+        results = self.algorithm_A(heuristic, print_results, reopen, budget, workers)
+        self.__reset__()
+        return results
+
+    """
+    Searches for puzzle solution with a hash-distributed parallel A* (HDA*) on workers processes.
+    Every worker owns the layouts whose hash falls in its partition, with their open list and closed states, and
+    sends the children it generates for the other partitions to their owners through queues (in batches).
+    A goal found with a lower cost than the best one so far becomes the incumbent solution. The search stops when
+    no child is in flight and no open list holds a node with f below the incumbent: with an admissible heuristic
+    no better solution is left, so the solution is optimal. Nodes are expanded out of the global f order, so closed
+    states are reopened when they are reached again at a lower cost.
+    The length of the search path counts the expansions of every worker. Its max_expansions limit applies to the
+    expansions of every worker together (one counter shared by the workers), and its time and memory limits to every
+    worker. The search file holds the expansions of every worker in turn (each worker writes its own part, which are
+    joined once the search is over). When the tree is instrumented, the SearchStats of the workers are added up
+    (peak open is the sum of the peaks of their open lists); on_expand is not called.
+    Raises RuntimeError (after stopping the other workers) if a worker exits abnormally.
+    Returns the same list as SearchTree.best_first_search.
+    """
+    def parallel_algorithm_A(self, heuristic, print_results, budget=None, workers=2):
+        if self.puzzle.bitboard.is_end(self.root.state): # nothing to distribute
+            return self.best_first_search(self.PRIORITY_F, heuristic, "a-h" + str(heuristic), print_results, True, budget)
+        start = time.time()
+        if budget is not None: budget.start(self.root)
+        self.budget = budget
+        context = get_context()
+        lock = context.Lock()
+        shared = {"incumbent": context.Value('d', self.UNSOLVABLE, lock=False), # cost of the best solution found
+                  "pending": context.Value('i', 1, lock=False), # batches of children sent and not yet received
+                  "min_f": context.Array('d', workers, lock=False), # lowest f published by every worker
+                  "done": context.Value('b', 0, lock=False), # set when the search is over
+                  "expanded": context.Value('q', 0, lock=False)} # expansions of every worker
+        inboxes = [context.Queue() for _ in range(workers)]
+        results = context.Queue() # ("goal", cost, moves), ("budget", reason) and ("done", expansions, generated, stats) messages
         current_directory = os.path.dirname(os.path.realpath(__file__))
-        output_directory = "outputs"
-        search_filename = "a-h" + str(heuristic) + "-search-" + str(self.id) + ".txt"
-        solution_filename = "a-h" + str(heuristic) + "-sol-" + str(self.id) + ".txt"
-        search_file = None
-        solution_file = None
+        search_path = os.path.join(current_directory, "outputs", "a-h" + str(heuristic) + "-search-" + str(self.id) + ".txt")
+        part_paths = [search_path + "." + str(worker) if print_results else None for worker in range(workers)]
+        tree_options = {"instrument": self.instrument or (self.on_expand is not None), "search_sample": self.search_sample}
+        processes = [context.Process(target=parallel_search_worker,
+                                     args=(worker, workers, self.puzzle.string_puzzle.split() + self.initial_fuel(), self.id, heuristic,
+                                           inboxes, results, lock, shared, budget, tree_options, part_paths[worker]))
+                     for worker in range(workers)]
+        for process in processes:
+            process.start()
+        inboxes[hash(self.root.state[0]) % workers].put([(self.root.state, 0, ())])
+
+        moves = None
+        reason = None
+        stats = self.stats = SearchStats() if tree_options["instrument"] else None
+        running = workers
+        while running:
+            try:
+                message = results.get(timeout=self.RESULTS_POLL_INTERVAL)
+            except Empty:
+                self.check_workers(processes, lock, shared["done"], inboxes)
+                continue
+            if message[0] == "goal":
+                if (moves is None) or (message[1] < len(moves)): moves = message[2]
+            elif message[0] == "budget":
+                reason = reason or message[1]
+            else:
+                running -= 1
+                self.closed_count += message[1]
+                self.generated_count += message[2]
+                if stats is not None:
+                    for counter, value in vars(message[3]).items():
+                        setattr(stats, counter, getattr(stats, counter) + value)
+        for process in processes:
+            process.join()
+        for inbox in inboxes:
+            inbox.close()
+
+        status = SearchResult.NO_SOLUTION
+        if reason is not None:
+            status = SearchResult.BUDGET_EXCEEDED
+            moves = None # a solution found before the limit may not be optimal
+        execution_time = round(time.time() - start, 4)
+        if moves is not None:
+            status = SearchResult.SOLVED
+            self.solution_path = self.replay(moves)
         if print_results:
-            search_file = open(os.path.join(current_directory, output_directory, search_filename), "w")
-            solution_file = open(os.path.join(current_directory, output_directory, solution_filename), "w")
+            search_file = TraceWriter(search_path, self.compress_output)
+            for part_path in part_paths:
+                with open(part_path) as part_file:
+                    for chunk in iter(lambda: part_file.read(1 << 20), ""):
+                        search_file.write(chunk)
+                os.remove(part_path)
+            solution_file = TraceWriter(os.path.join(current_directory, "outputs", "a-h" + str(heuristic) + "-sol-" + str(self.id) + ".txt"), self.compress_output)
+            if status == SearchResult.SOLVED:
+                goal_node = self.solution_path[-1] if self.solution_path else self.root
+                search_file.write(self.format_search_node(goal_node))
+                self.write_solution(solution_file, goal_node, execution_time)
+            else:
+                solution_file.write("no solution" if reason is None else SearchResult([], status, reason).describe())
+            search_file.close()
+            solution_file.close()
+        return SearchResult([len(self.solution_path), self.closed_count, execution_time], status, reason, stats)
+
+    # stops every worker of the parallel search and raises RuntimeError if one of them exited abnormally
+    def check_workers(self, processes, lock, done, inboxes):
+        crashed = [(worker, process.exitcode) for worker, process in enumerate(processes) if process.exitcode not in (None, 0)]
+        if not crashed: return
+        with lock:
+            done.value = 1
+        for process in processes:
+            if process.exitcode is None: process.terminate()
+        for process in processes:
+            process.join()
+        for inbox in inboxes:
+            inbox.close()
+        worker, exitcode = crashed[0]
+        raise RuntimeError("Parallel search worker " + str(worker) + " exited with code " + str(exitcode))
+
+    # returns the fuel overrides of the puzzle as puzzle fields (car followed by its fuel)
+    def initial_fuel(self):
+        return [car + str(fuel) for car, fuel in self.puzzle.fuel.items()]
+
+    # returns the nodes of the solution path following (car index, action code, moves) moves from the root
+    def replay(self, moves):
+        bitboard = self.puzzle.bitboard
+        path = []
+        node = self.root
+        for car, action, car_moves in moves:
+            state = bitboard.move(node.state, car, RushHour.ACTIONS[action], car_moves)
+            node = SearchNode(state, node, car, action, car_moves, node.g + 1, 0)
+            path.append(node)
+        return path
+
+"""
+Runs one worker of AlgorithmASearchTree.parallel_algorithm_A: worker is its partition (layouts with hash(layout) % workers
+equal to worker), inboxes the queues of children batches of every worker, results the queue of the messages to the
+caller and shared the values read and written under lock (incumbent cost, batches in flight, lowest f published by every
+worker, done flag and expansions of every worker together). Nodes travel as (state, g, moves from the root), so any
+worker can report a solution. tree_options are the SearchTree options of the worker tree (instrument, search_sample);
+with a search_path, the expansions of the worker are written to that file.
+"""
+def parallel_search_worker(worker, workers, puzzle, puzzle_number, heuristic, inboxes, results, lock, shared, budget, tree_options, search_path=None):
+    tree = AlgorithmASearchTree(puzzle, puzzle_number, **tree_options)
+    tree.reopen = True # nodes are not expanded in the global f order, so a closed state may be reached at a lower cost
+    bitboard = tree.puzzle.bitboard
+    successors = bitboard.successors
+    evaluate = tree.heuristics.get(heuristic)
+    stats = tree.stats = SearchStats() if tree.instrument else None
+    if stats is not None:
+        successors = stats.timed(lambda state, generate=successors: tuple(generate(state)), "move_time")
+        if evaluate is not None: evaluate = stats.timed(evaluate, "heuristic_time")
+    search_file = None if search_path is None else TraceWriter(search_path, False, tree.search_sample)
+    incumbent, pending, min_f, done, expanded = shared["incumbent"], shared["pending"], shared["min_f"], shared["done"], shared["expanded"]
+    max_expansions = None if budget is None else budget.max_expansions
+    inbox = inboxes[worker]
+    heap = [] # (f, order, state, g, moves) of the open nodes of the partition
+    best_g = {} # state -> lowest g of the state in open
+    order = count()
+    outboxes = [[] for _ in range(workers)] # children generated for every partition since the last exchange
+    if budget is not None: budget.start(tree.root)
+    tree.budget = budget
+
+    # adds a node of the partition to open unless it cannot beat the incumbent or a closed or open state dominates it
+    def push(state, g, moves):
+        node = SearchNode(state, None, None, None, None, g, 0)
+        if evaluate is not None:
+            node.set_h(evaluate(node))
+        if node.f >= incumbent.value:
+            return
+        if tree.is_closed(node):
+            if stats is not None: stats.closed_duplicates += 1
+            return
+        if best_g.get(state, tree.UNSOLVABLE) <= g:
+            if stats is not None: stats.open_duplicates += 1
+            return
+        best_g[state] = g
+        if stats is not None:
+            open_start = time.perf_counter()
+            heappush(heap, (node.f, next(order), state, g, moves))
+            stats.open_time += time.perf_counter() - open_start
+            stats.peak_open = max(stats.peak_open, len(heap))
+        else:
+            heappush(heap, (node.f, next(order), state, g, moves))
 
-        start = time.time()
-        execution_time = 0
+    # counts an expansion in the expansions shared by every worker, returns False once they reached max_expansions
+    def reserve_expansion():
+        with lock:
+            if (max_expansions is not None) and (expanded.value >= max_expansions):
+                return False
+            expanded.value += 1
+            return True
+
+    # stops every worker at a limit of the budget
+    def stop(reason):
+        with lock:
+            done.value = 1
+        results.put(("budget", reason))
+
+    # publishes the lowest f of open (stale heap entries only make it lower) and checks if the search is over
+    def publish():
+        min_f[worker] = heap[0][0] if heap else tree.UNSOLVABLE
+        if (pending.value == 0) and all(f >= incumbent.value for f in min_f):
+            done.value = 1
+
+    while not done.value:
+        if budget is not None:
+            reason = budget.exceeded(tree) # time and memory (the expansions are counted by reserve_expansion)
+            if reason is not None:
+                stop(reason)
+                break
 
-        while True:
-            if self.puzzle.is_end(self.open[0].board): # REACHED GOAL
-                if print_results:
-                    solution_file.write("Initial board configuration: " + self.puzzle.string_puzzle + "\n\n")
-                    solution_file.write(self.puzzle.stringify_board() + "\n")
-                    solution_file.write("Car fuel available: " + str(self.puzzle.fuel) + "\n")
-                execution_time = round(time.time() - start, 4)
-                current_node = self.open[0]
-                if print_results:
-                    solution_file.write(F'Runtime: {execution_time}s \n')
-                    search_file.write(str(current_node.f) + " " + str(current_node.g) + " " + str(current_node.h) + " " + current_node.string_puzzle)
-                
-                # compute solution path
-                while True:
-                    self.solution_path.append(current_node)
-                    if current_node.parent == None: break
-                    else: current_node = current_node.parent
-                self.solution_path.reverse()
-                self.solution_path.pop(0) # removes root node from solution path
-
-                # write solutions to file
-                if print_results:
-                    solution_file.write("Search path length: " + str(len(self.closed)) + " states\n")
-                    solution_file.write("Solution path length: " + str(len(self.solution_path)) + " moves\n")
-                    solution_file.write("Solution path: ")
-                    for node in self.solution_path:
-                        solution_file.write(node.car + " " + node.action + " " + str(node.moves) + "; ")
-                    solution_file.write("\n\n")
-                    for node in self.solution_path:
-                        solution_file.write(node.car + " " + node.action + " " + str(node.moves) + "             " + str(node.fuel[node.car]) + " " + node.string_puzzle + "\n")
-                    solution_file.write("\n")
-                    solution_file.write(self.puzzle.stringify_board(self.open[0].string_puzzle))
+        # receive the children sent by the other workers (wait for them when there is nothing to expand)
+        idle = (not heap) or (heap[0][0] >= incumbent.value)
+        batches = []
+        try:
+            batches.append(inbox.get(timeout=AlgorithmASearchTree.POLL_INTERVAL) if idle else inbox.get_nowait())
+            while True:
+                batches.append(inbox.get_nowait())
+        except Empty:
+            pass
+        for batch in batches:
+            for state, g, moves in batch:
+                push(state, g, moves)
+        with lock:
+            pending.value -= len(batches)
+            publish()
+
+        # expand a batch of the nodes of lowest f
+        if incumbent.value != tree.UNSOLVABLE: # only solutions shorter than the incumbent are worth finding
+            tree.horizon = int(incumbent.value) - 1
+        for _ in range(AlgorithmASearchTree.EXPANSION_BATCH):
+            if (not heap) or (heap[0][0] >= incumbent.value): break
+            if stats is not None: open_start = time.perf_counter()
+            f, _, state, g, moves = heappop(heap)
+            if stats is not None: stats.open_time += time.perf_counter() - open_start
+            if best_g.get(state) != g: continue # stale entry: the state was reached again at a lower cost
+            node = SearchNode(state, None, None, None, None, g, f - g)
+            if tree.is_closed(node):
+                del best_g[state]
+                if stats is not None: stats.closed_duplicates += 1
+                continue
+            if not reserve_expansion():
+                stop("max_expansions")
                 break
-            else:
-                # removes this node from the open list if list contains another similar state of lower or same cost
-                if self.has_lower_cost_in_open_algorithm_A(self.open[0]) or (self.open[0].string_puzzle in self.visited):
-                    self.open.pop(0)
-                    if len(self.open) == 0: # no solution can be found
-                        execution_time = round(time.time() - start, 4)
-                        if print_results: solution_file.write("no solution")
-                        break
+            del best_g[state]
+            tree.close(node)
+            tree.closed_count += 1
+            if (search_file is not None) and search_file.sample_next():
+                search_file.write(tree.format_search_node(node) + "\n")
+            for car, action, car_moves, child in successors(state):
+                tree.generated_count += 1
+                child_moves = moves + ((car, action, car_moves),)
+                if bitboard.is_end(child): # REACHED GOAL: a new incumbent if it is cheaper
+                    with lock:
+                        if g + 1 < incumbent.value:
+                            incumbent.value = g + 1
+                            results.put(("goal", g + 1, child_moves))
                     continue
+                owner = hash(child[0]) % workers
+                if owner == worker:
+                    push(child, g + 1, child_moves)
+                else:
+                    outboxes[owner].append((child, g + 1, child_moves))
+
+        # send the children of the other partitions (counted in flight before open stops holding their parents)
+        with lock:
+            for owner, children in enumerate(outboxes):
+                if children and not done.value:
+                    pending.value += 1
+                    inboxes[owner].put(children)
+            publish()
+        outboxes = [[] for _ in range(workers)]
+
+    for other_inbox in inboxes: # children left in flight by a stopped search are dropped
+        other_inbox.cancel_join_thread()
+    if search_file is not None:
+        search_file.close()
+    if stats is not None:
+        stats.generated = tree.generated_count
+        stats.expanded = tree.closed_count
+    results.put(("done", tree.closed_count, tree.generated_count, stats))
+
+class WeightedAStarSearchTree(SearchTree):
+    """
+    WeightedAStarSearchTree searches for the puzzle solution with weighted A*: open ordered by g + weight * h.
+    A weight above 1 trusts the heuristic more than the cost so far, so fewer states are expanded than by
+    Algorithm A. With a consistent heuristic (or an admissible one when closed states are reopened) the solution
+    is at most weight times as long as an optimal one; otherwise there is no bound. Weight 1 is Algorithm A.
+    """
 
-                children = self.generate_all_children_algorithm_A(self.open[0], heuristic) # generate all unvisited children
+    DEFAULT_WEIGHT = 2.0
 
-                # add children to visit to open
-                for child in children:
-                    self.open.append(child)
+    def __init__(self, *args, weight=DEFAULT_WEIGHT, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.weight = weight
+        self.heuristic = None # heuristic of the current search
 
-                # sort open by lowest f
-                self.open.sort(key=attrgetter('f'))
+    """
+        Returns the suboptimality bound of the solutions found with a weight and heuristic: at most bound times the
+        length of an optimal solution. Returns None if the heuristic gives no bound (not consistent, or not
+        admissible when closed states are reopened).
+    """
+    @classmethod
+    def bound(cls, weight, heuristic, reopen=False):
+        if (heuristic in cls.CONSISTENT_HEURISTICS) or (reopen and (heuristic in cls.ADMISSIBLE_HEURISTICS)):
+            return max(1.0, weight)
+        return None
 
-                # close current node
-                visited_node = self.open.pop(0)
-                self.closed.append(visited_node)
-                self.visited.append(visited_node.string_puzzle)
+    """
+    Searches for puzzle solution with weighted A* (open ordered by g + weight * h).
+    Returns the same list as SearchTree.best_first_search.
+    """
+    def weighted_algorithm_A(self, heuristic, print_results, reopen=False, budget=None):
+        output_name = "wa-w" + format(self.weight, "g") + "-h" + str(heuristic)
+        self.heuristic = heuristic
+        return self.best_first_search(self.weighted_priority(self.weight), heuristic, output_name, print_results, reopen, budget)
 
-                # add searched node to search file
-                if print_results:
-                    current_search = str(visited_node.f) + " " + str(visited_node.g) + " " + str(visited_node.h) + " " + visited_node.string_puzzle
-                    search_file.write(current_search + "\n")
+    def run_weighted_algorithm_A(self, heuristic, print_results, reopen=False, budget=None):
+        results = self.weighted_algorithm_A(heuristic, print_results, reopen, budget)
+        self.__reset__()
+        return results
 
-                if len(self.open) == 0: # no solution can be found
-                    execution_time = round(time.time() - start, 4)
-                    if print_results: solution_file.write("no solution")
+    # writes the solution found at goal_node to solution file, with its suboptimality bound
+    def write_solution(self, solution_file, goal_node: SearchNode, execution_time):
+        super().write_solution(solution_file, goal_node, execution_time)
+        bound = self.bound(self.weight, self.heuristic, self.reopen)
+        if bound is None:
+            solution_file.write("\nSuboptimality bound: none (h" + str(self.heuristic) + " is not known to be consistent)\n")
+        else:
+            solution_file.write("\nSuboptimality bound: " + format(bound, "g") + " x optimal solution length\n")
+
+class BeamSearchTree(SearchTree):
+    """
+    BeamSearchTree searches for the puzzle solution with beam search: a breadth-first search that only keeps the
+    beam_width children of lowest h of every level (ties kept in the order they were generated).
+    Open never holds more than beam_width nodes and the closed states grow by at most beam_width per level,
+    so memory is bounded by the width and the depth of the search. The search is fast but incomplete: the goal
+    may be cut off the beam (reported as no solution) and the solution found is not always optimal.
+    """
+
+    DEFAULT_WIDTH = 100
+
+    def __init__(self, *args, beam_width=DEFAULT_WIDTH, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.beam_width = beam_width
+
+    """
+    Searches for puzzle solution with beam search, one level of the tree at a time.
+    Returns the same list as SearchTree.best_first_search.
+    """
+    def beam_search(self, heuristic, print_results, budget=None):
+        status = SearchResult.NO_SOLUTION
+        reason = None
+
+        # initialize output files
+        current_directory = os.path.dirname(os.path.realpath(__file__))
+        output_name = "beam-w" + str(self.beam_width) + "-h" + str(heuristic)
+        search_file = None
+        solution_file = None
+        if print_results:
+            search_file = TraceWriter(os.path.join(current_directory, "outputs", output_name + "-search-" + str(self.id) + ".txt"), self.compress_output, self.search_sample)
+            solution_file = TraceWriter(os.path.join(current_directory, "outputs", output_name + "-sol-" + str(self.id) + ".txt"), self.compress_output)
+
+        start = time.time()
+        if budget is not None: budget.start(self.root)
+        self.budget = budget
+        stats = self.stats = SearchStats() if (self.instrument or self.on_expand is not None) else None
+        is_end = self.puzzle.bitboard.is_end
+        beam = [self.root] # nodes of the current level
+        goal_node = None
+        while beam:
+            if budget is not None:
+                reason = budget.exceeded(self)
+                if reason is not None: # stop the search at the limit
                     break
+            goal_node = next((node for node in beam if is_end(node.state)), None)
+            if goal_node is not None: # REACHED GOAL
+                break
+
+            level = {} # state -> first node of the next level reaching it
+            for current_node, children in zip(beam, self.generate_children(beam, heuristic)):
+                self.generated_count += len(children)
+                for child in children:
+                    if child.state not in level:
+                        level[child.state] = child
+                    elif stats is not None:
+                        stats.open_duplicates += 1
+
+                # close current node
+                self.close(current_node)
+                self.closed_count += 1
+                if self.trace: self.closed.append(current_node)
+                if print_results and search_file.sample_next():
+                    search_file.write(self.format_search_node(current_node) + "\n")
+                if self.on_expand is not None:
+                    self.on_expand(self, current_node, stats)
+
+            # keep the beam_width best nodes of the next level (nsmallest is stable, so ties keep their order)
+            beam = nsmallest(self.beam_width, level.values(), key=self.PRIORITY_H)
+            if stats is not None: stats.peak_open = max(stats.peak_open, len(beam))
+
+        execution_time = round(time.time() - start, 4)
+        if goal_node is not None:
+            status = SearchResult.SOLVED
+            self.solution_path = self.get_solution_path(goal_node)
+            if print_results:
+                search_file.write(self.format_search_node(goal_node))
+                self.write_solution(solution_file, goal_node, execution_time)
+        elif reason is not None:
+            status = SearchResult.BUDGET_EXCEEDED
+            if print_results: solution_file.write(SearchResult([], status, reason).describe())
+        elif print_results:
+            solution_file.write("no solution")
         if print_results:
             search_file.close()
-            solution_file.close() 
-        return [len(self.solution_path), len(self.closed), execution_time]
+            solution_file.close()
+        if stats is not None:
+            stats.generated = self.generated_count
+            stats.expanded = self.closed_count
+        return SearchResult([len(self.solution_path), self.closed_count, execution_time], status, reason, stats)
+
+    def run_beam_search(self, heuristic, print_results, budget=None):
+        results = self.beam_search(heuristic, print_results, budget)
+        self.__reset__()
+        return results
 
-    def generate_all_children_algorithm_A(self, node: SearchNode, heuristic):
-        children = []
-        for car in self.puzzle.cars:
-            for action in self.ACTIONS:
-                move_counter = 1
-                while True:
-                    child = self.puzzle.preview_action(car, action, move_counter, node.fuel, node.board)
-                    if child == None: break # changes action for car if move is not valid
-                    # adds new children (cost is always +1 no matter the distance)
-                    child_node = SearchNode(child[0], child[1], child[2], node, car, action, move_counter, (node.g + 1), 0)
-
-                    # calculating h value
-                    h_value = 0
-                    if heuristic == 1:
-                        h_value = self.h1_blocked_vehicles(child_node)
-                    elif heuristic == 2:
-                        h_value = self.h2_blocked_positions(child_node)
-                    elif heuristic == 3:
-                        h_value = self.h3_multiplier_blocked_vehicles(child_node)
-                    elif heuristic == 4:
-                        h_value = self.h4_open_positions(child_node)
-                    child_node.set_h(h_value)
-
-                    is_parent_node = (child_node.string_puzzle == node.string_puzzle)
-                    has_been_visited = (child_node.string_puzzle in self.visited)
-
-                    if not is_parent_node and not has_been_visited:
-                        children.append(child_node) 
-                    move_counter += 1
-        node.set_children(children)
-        return children
+class RetrogradeSearchTree(SearchTree):
 
-    def has_lower_cost_in_open_algorithm_A(self, node: SearchNode):
-        skip_first = True
-        for open_node in self.open:
-            # skips the first place (since this method is called from the first node in open always)
-            # don't want to compare it to itself
-            if skip_first:
-                skip_first = False
-                continue
-            if (open_node.string_puzzle == node.string_puzzle) and (open_node.f <= node.f):
-                return True
-        return False
-    
-    def h1_blocked_vehicles(self, node: SearchNode):
-        a_coordinates = self.puzzle.get_car_coordinates('A', node.board) # get coordinates of Ambulance (A)
-        max_a_coordinate = max(a_coordinates,key=itemgetter(0))[0] # A's highest x-coordinate value
-        blocked_pointer = max_a_coordinate + 1 # set pointer to right of max coordinate of A
-        blocked_cars = [] # initialize empty list of blocked cars
-        
-        for x in range(blocked_pointer, 6):
-            position = node.board[x][2]
-            if (position not in blocked_cars) and (position != "."): 
-                blocked_cars.append(position)
-        return len(blocked_cars)
+    # ties on f are broken by the lowest h, so an exact heuristic leads straight down to the goal
+    PRIORITY_F_H = attrgetter('f', 'h')
 
-    def h2_blocked_positions(self, node: SearchNode):
-        a_coordinates = self.puzzle.get_car_coordinates('A', node.board) # get coordinates of Ambulance (A)
-        max_a_coordinate = max(a_coordinates,key=itemgetter(0))[0] # A's highest x-coordinate value
-        blocked_pointer = max_a_coordinate + 1 # set pointer to right of max coordinate of A
-        blocked_positions = [] # initialize empty list of blocked positions
-        
-        for x in range(blocked_pointer, 6):
-            position = node.board[x][2]
-            if (position != "."): blocked_positions.append(position)
-        return len(blocked_positions)
-    
-    def h3_multiplier_blocked_vehicles(self, node: SearchNode):
-        a_coordinates = self.puzzle.get_car_coordinates('A', node.board) # get coordinates of Ambulance (A)
-        max_a_coordinate = max(a_coordinates,key=itemgetter(0))[0] # A's highest x-coordinate value
-        blocked_pointer = max_a_coordinate + 1 # set pointer to right of max coordinate of A
-        blocked_cars = [] # initialize empty list of blocked cars
-        
-        for x in range(blocked_pointer, 6):
-            position = node.board[x][2]
-            if (position not in blocked_cars) and (position != "."): 
-                blocked_cars.append(position)
-        return 2 * len(blocked_cars)
+    """
+    Solves the puzzle from its RetrogradeTable. When the table distance of the initial state is exact (every car has
+    the fuel for that many slides), the solution is a walk down the table, one lookup per move. Otherwise fuel may
+    bind and the puzzle is solved by Algorithm A with the table distances (h8), ties broken by h, which is still
+    optimal. Returns the same list as SearchTree.best_first_search (time includes the table).
+    """
+    def retrograde(self, print_results, budget=None):
+        start = time.time()
+        if budget is not None: budget.start(self.root)
+        self.budget = budget
+        if (self.retrograde_table is None) or (not self.retrograde_table.complete): # a table may be given by the caller
+            self.retrograde_table = RetrogradeTable(self.puzzle.bitboard, budget)
+        table_time = time.time() - start
+        if not self.retrograde_table.complete:
+            return SearchResult([0, self.retrograde_table.closed_count, round(table_time, 4)], SearchResult.BUDGET_EXCEEDED, self.retrograde_table.reason)
+        if self.retrograde_table.exact_distance(self.root.state) != RetrogradeTable.UNKNOWN:
+            return self.walk_table(print_results, start)
+        results = self.best_first_search(self.PRIORITY_F_H, 8, "retrograde", print_results, budget=budget)
+        results[2] = round(results[2] + table_time, 4)
+        return results
 
-    def h4_open_positions(self, node: SearchNode):
-        a_coordinates = self.puzzle.get_car_coordinates('A', node.board) # get coordinates of Ambulance (A)
-        max_a_coordinate = max(a_coordinates,key=itemgetter(0))[0] # A's highest x-coordinate value
-        blocked_pointer = max_a_coordinate + 1 # set pointer to right of max coordinate of A
-        open_counter = 0
-        for x in range(blocked_pointer, 6):
-            position = node.board[x][2]
-            if (position == "."): open_counter += 1
-        return open_counter
-    
-    def __reset__(self):
-        self.open = [self.root]
-        self.closed = []
-        self.visited = []
-        self.solution_path = []
+    """
+    Follows the first next move of the table from the initial state to the goal (its table distance is exact),
+    writing every state of the path to the search file. The length of the search path counts the states left.
+    """
+    def walk_table(self, print_results, start):
+        table = self.retrograde_table
+        search_file = None
+        solution_file = None
+        if print_results:
+            current_directory = os.path.dirname(os.path.realpath(__file__))
+            search_file = TraceWriter(os.path.join(current_directory, "outputs", "retrograde-search-" + str(self.id) + ".txt"), self.compress_output, self.search_sample)
+            solution_file = TraceWriter(os.path.join(current_directory, "outputs", "retrograde-sol-" + str(self.id) + ".txt"), self.compress_output)
+
+        status = SearchResult.NO_SOLUTION
+        node = self.root
+        if table.distance(node.state) is not None: # reachable ignoring fuel, with the fuel for it
+            node.set_h(table.distance(node.state))
+            moves = table.next_moves(node.state)
+            while True:
+                if print_results and (not moves or search_file.sample_next()):
+                    search_file.write(self.format_search_node(node) + ("\n" if moves else ""))
+                if not moves: break # REACHED GOAL
+                self.closed_count += 1
+                self.generated_count += len(moves)
+                car_index, action, car_moves, child = moves[0]
+                node = SearchNode(child, node, car_index, action, car_moves, (node.g + 1), table.distance(child))
+                moves = table.next_moves(child)
+            status = SearchResult.SOLVED
+            self.solution_path = self.get_solution_path(node)
+        execution_time = round(time.time() - start, 4)
+        if print_results:
+            if status == SearchResult.SOLVED:
+                self.write_solution(solution_file, node, execution_time)
+            else:
+                solution_file.write("no solution")
+            search_file.close()
+            solution_file.close()
+        return SearchResult([len(self.solution_path), self.closed_count, execution_time], status)
 
-    def run_algorithm_A(self, heuristic, print_results):
-        results = self.algorithm_A(heuristic, print_results)
+    def run_retrograde(self, print_results, budget=None):
+        results = self.retrograde(print_results, budget)
         self.__reset__()
         return results
 
+class IDAStarSearchTree(SearchTree):
+    """
+    IDAStarSearchTree searches for the puzzle solution with iterative-deepening A*: depth-first searches bounded by
+    f = g + h, the bound raised to the lowest f that exceeded it until the goal is found. Only the nodes of the
+    current path (and their pending successors) are kept, so memory grows with the depth of the solution instead
+    of the number of explored states. States already on the path are skipped.
+    An optional transposition table (at most transposition_size layouts, cleared every iteration) skips states
+    dominated by the last visit of their layout in an iteration (same or lower cost, at least as much fuel).
+    IDA* cannot prove a puzzle unsolvable in practice: without the table every iteration walks every simple path
+    within the bound again, so an unsolvable puzzle never ends. Give a search a SearchBudget unless the puzzle is
+    known to be solvable (batch runs give IDA* searches IDA_MAX_EXPANSIONS when they have no budget).
+    """
+
+    def __init__(self, *args, transposition_size=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transposition_size = transposition_size
+
+    """
+    Searches for puzzle solution with IDA* (optimal with an admissible heuristic).
+    The length of the search path counts the expansions of every iteration. For SearchBudget the generated nodes
+    are the nodes held in memory (path and transposition table).
+    When the tree is instrumented, peak open is the deepest path and closed duplicates count the states skipped
+    because they were on the path or in the transposition table.
+    Returns the same list as SearchTree.best_first_search.
+    """
+    def ida_star(self, heuristic, print_results, budget=None):
+        status = SearchResult.NO_SOLUTION
+        reason = None
+
+        # initialize output files
+        current_directory = os.path.dirname(os.path.realpath(__file__))
+        output_name = "ida-h" + str(heuristic)
+        search_file = None
+        solution_file = None
+        if print_results:
+            search_file = TraceWriter(os.path.join(current_directory, "outputs", output_name + "-search-" + str(self.id) + ".txt"), self.compress_output, self.search_sample)
+            solution_file = TraceWriter(os.path.join(current_directory, "outputs", output_name + "-sol-" + str(self.id) + ".txt"), self.compress_output)
+
+        start = time.time()
+        if budget is not None: budget.start(self.root)
+        self.budget = budget
+        bitboard = self.puzzle.bitboard
+        evaluate = self.heuristics.get(heuristic)
+        stats = self.stats = SearchStats() if (self.instrument or self.on_expand is not None) else None
+        if (stats is not None) and (evaluate is not None): evaluate = stats.timed(evaluate, "heuristic_time")
+        if evaluate is not None: self.root.set_h(evaluate(self.root))
+
+        goal_node = self.root if bitboard.is_end(self.root.state) else None
+        bound = self.root.f
+        while (goal_node is None) and (reason is None) and (bound != self.UNSOLVABLE):
+            next_bound = self.UNSOLVABLE # lowest f above the bound
+            transpositions = {} # layout -> (g, packed fuel) of the last visit in this iteration
+            path = [(self.root, self.successors(self.root))] # nodes of the current path with their pending successors
+            on_path = {self.root.state[0]} # layouts on the path (a layout reached again has less fuel)
+            self.closed_count += 1
+            if print_results and search_file.sample_next():
+                search_file.write(self.format_search_node(self.root) + "\n")
+            while path and (goal_node is None):
+                if budget is not None:
+                    self.generated_count = len(path) + len(transpositions)
+                    reason = budget.exceeded(self)
+                    if reason is not None: # stop the search at the limit
+                        break
+                node, successors = path[-1]
+                for car_index, action, moves, child in successors:
+                    child_node = SearchNode(child, node, car_index, action, moves, (node.g + 1), 0)
+                    if stats is not None: stats.generated += 1
+                    if child[0] in on_path:
+                        if stats is not None: stats.closed_duplicates += 1
+                        continue
+                    if evaluate is not None:
+                        child_node.set_h(evaluate(child_node))
+                        if child_node.h == self.UNSOLVABLE: continue
+                    if child_node.f > bound: # beyond this iteration
+                        next_bound = min(next_bound, child_node.f)
+                        continue
+                    if self.transposition_size:
+                        # fuel beyond what can be used in the bound - g moves left of this iteration cannot bind
+                        fuel = bitboard.clamp_fuel(child[1], bitboard.fuel_cap(bound - child_node.g))
+                        seen = transpositions.get(child[0])
+                        if (seen is not None) and (seen[0] <= child_node.g) and bitboard.has_more_fuel(seen[1], fuel):
+                            if stats is not None: stats.closed_duplicates += 1
+                            continue
+                        if (seen is not None) or (len(transpositions) < self.transposition_size):
+                            transpositions[child[0]] = (child_node.g, fuel)
+                    if bitboard.is_end(child): # REACHED GOAL
+                        goal_node = child_node
+                        break
+                    # go one level deeper
+                    path.append((child_node, self.successors(child_node)))
+                    on_path.add(child[0])
+                    self.closed_count += 1
+                    if print_results and search_file.sample_next():
+                        search_file.write(self.format_search_node(child_node) + "\n")
+                    if stats is not None:
+                        stats.peak_open = max(stats.peak_open, len(path))
+                        if self.on_expand is not None: self.on_expand(self, child_node, stats)
+                    break
+                else: # every successor was searched: backtrack
+                    path.pop()
+                    on_path.discard(node.state[0])
+            bound = next_bound
+
+        execution_time = round(time.time() - start, 4)
+        if goal_node is not None:
+            status = SearchResult.SOLVED
+            self.solution_path = self.get_solution_path(goal_node)
+            if print_results:
+                search_file.write(self.format_search_node(goal_node))
+                self.write_solution(solution_file, goal_node, execution_time)
+        elif reason is not None:
+            status = SearchResult.BUDGET_EXCEEDED
+            if print_results: solution_file.write(SearchResult([], status, reason).describe())
+        elif print_results:
+            solution_file.write("no solution")
+        if print_results:
+            search_file.close()
+            solution_file.close()
+        if stats is not None: stats.expanded = self.closed_count
+        return SearchResult([len(self.solution_path), self.closed_count, execution_time], status, reason, stats)
+
+    # returns an iterator over the (car index, action, moves, state) successors of a node
+    def successors(self, node: SearchNode):
+        if self.successor_cache is not None:
+            return iter(self.successor_cache.successors(self.puzzle.bitboard, node.state))
+        return self.puzzle.bitboard.successors(node.state)
+
+    def run_ida_star(self, heuristic, print_results, budget=None):
+        results = self.ida_star(heuristic, print_results, budget)
+        self.__reset__()
+        return results
+
+class PuzzleRecord:
+    """
+    PuzzleRecord is a puzzle read from a puzzle file: its number (puzzles are numbered from 1, comment and empty
+    lines excluded), the line of the file it comes from, its fields (board string and fuel overrides) and the
+    reason it is not configured properly (None for a valid puzzle).
+    """
+    __slots__ = ('number', 'line_number', 'fields', 'error')
+
+    def __init__(self, number, line_number, fields, error):
+        self.number = number
+        self.line_number = line_number
+        self.fields = fields
+        self.error = error
+
+"""
+Yields a PuzzleRecord for every puzzle of a puzzle file. The file is read lazily one line at a time,
+so files with millions of puzzles are never held in memory. Every puzzle is checked with RushHour.check_puzzle.
+"""
+def read_puzzles(path):
+    with open(path, 'r') as puzzles_file:
+        number = 0
+        for line_number, line in enumerate(puzzles_file, 1):
+            line = line.strip()
+            if (not line) or line.startswith('#'): continue # skips over empty and comment lines
+            number += 1
+            fields = line.split()
+            yield PuzzleRecord(number, line_number, fields, RushHour.check_puzzle(fields))
+
+class SolutionCache:
+    """
+    SolutionCache is a persistent SQLite cache of finished searches: (puzzle, fuel, algorithm, heuristic) ->
+    solution length, search path length, execution time, status and solution moves.
+    Puzzles are keyed in a canonical form where the cars other than the ambulance are relabelled B, C, D... in
+    order of first appearance on the board and only the fuel that differs from the default is kept, so the same
+    puzzle written with other letters hits the same entry. Relabelling in that order keeps the order of the cars in
+    the BitBoard, so the cached result is the one the search would return. Moves are stored with the canonical
+    labels and translated back to the labels of the caller.
+    The cache holds at most max_entries results and evicts the least recently used. Searches stopped by their
+    budget are not cached.
+    """
+
+    LABELS = "BCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz" # canonical labels of the cars other than 'A'
+    DEFAULT_FUEL = 100
+
+    opened = {} # path -> SolutionCache opened in this process
+
+    def __init__(self, path, max_entries=100000):
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path, timeout=60) # several worker processes may share the file
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS solutions (puzzle TEXT, algorithm TEXT, heuristic INTEGER, "
+                                    "solution_length INTEGER, search_path_length INTEGER, execution_time REAL, status TEXT, "
+                                    "moves TEXT, last_used REAL, PRIMARY KEY (puzzle, algorithm, heuristic))")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+
+    # returns the cache of a path, reusing the cache already opened by this process
+    @classmethod
+    def for_path(cls, path, max_entries):
+        cache = cls.opened.get(path)
+        if cache is None:
+            cache = cls.opened[path] = cls(path, max_entries)
+        cache.max_entries = max_entries
+        return cache
+
+    """
+        Returns the canonical form of puzzle fields as (key, labels): key is the canonical board string followed by
+        the fuel that differs from the default, labels maps every label of the puzzle to its canonical label.
+    """
+    @classmethod
+    def canonicalize(cls, p):
+        labels = {'A': 'A', '.': '.', '/': '/'}
+        for car in p[0]:
+            if car not in labels:
+                labels[car] = cls.LABELS[len(labels) - 3]
+        fuel = {}
+        for fuel_info in p[1:]: # a later override of the same car wins, as in RushHour.initialize_game
+            fuel[labels[fuel_info[0]]] = int(fuel_info[1:])
+        overrides = sorted(car + str(amount) for car, amount in fuel.items() if amount != cls.DEFAULT_FUEL)
+        return " ".join(["".join(labels[car] for car in p[0])] + overrides), labels
+
+    """
+        Returns (SearchResult, moves) of a cached search of a puzzle, with the (car, action, moves) moves using the
+        labels of p. Returns None if the search is not cached.
+    """
+    def lookup(self, p, algorithm, heuristic):
+        key, labels = self.canonicalize(p)
+        heuristic = -1 if heuristic is None else heuristic
+        with self.connection:
+            row = self.connection.execute("SELECT solution_length, search_path_length, execution_time, status, moves FROM solutions "
+                                          "WHERE puzzle = ? AND algorithm = ? AND heuristic = ?", (key, algorithm, heuristic)).fetchone()
+            if row is None: return None
+            self.connection.execute("UPDATE solutions SET last_used = ? WHERE puzzle = ? AND algorithm = ? AND heuristic = ?",
+                                    (time.time(), key, algorithm, heuristic))
+        original = {canonical: car for car, canonical in labels.items()}
+        moves = [(original[car], action, car_moves) for car, action, car_moves in json.loads(row[4])]
+        return SearchResult([row[0], row[1], row[2]], row[3]), moves
+
+    # stores the result and the (car, action, moves) moves of a finished search of a puzzle
+    def store(self, p, algorithm, heuristic, results, moves):
+        if results.status == SearchResult.BUDGET_EXCEEDED: return
+        key, labels = self.canonicalize(p)
+        heuristic = -1 if heuristic is None else heuristic
+        canonical_moves = json.dumps([(labels[car], action, car_moves) for car, action, car_moves in moves])
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (key, algorithm, heuristic, results[0], results[1], results[2], results.status, canonical_moves, time.time()))
+            excess = self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0] - self.max_entries
+            if excess > 0: # evict the least recently used results
+                self.connection.execute("DELETE FROM solutions WHERE rowid IN (SELECT rowid FROM solutions ORDER BY last_used LIMIT ?)", (excess,))
+
+BATCH_HEURISTICS = [1, 2, 3, 4] # heuristics run by default in a batch
+IDA_MAX_EXPANSIONS = 200000 # expansions of an IDA* search of a batch run without a budget (IDA* cannot prove a puzzle unsolvable)
+
+# tree class and search of every algorithm: search(tree, heuristic, print_results, budget) returns a SearchResult
+SEARCHES = {"UCS": (UCSSearchTree, lambda tree, heuristic, print_results, budget: tree.uniform_cost_search(print_results, budget)),
+            "GBFS": (GBFSSearchTree, lambda tree, heuristic, print_results, budget: tree.GBFS(heuristic, print_results, budget)),
+            "Algorithm A": (AlgorithmASearchTree, lambda tree, heuristic, print_results, budget: tree.algorithm_A(heuristic, print_results, budget=budget)),
+            "Weighted A*": (WeightedAStarSearchTree, lambda tree, heuristic, print_results, budget: tree.weighted_algorithm_A(heuristic, print_results, budget=budget)),
+            "Beam": (BeamSearchTree, lambda tree, heuristic, print_results, budget: tree.beam_search(heuristic, print_results, budget)),
+            "IDA*": (IDAStarSearchTree, lambda tree, heuristic, print_results, budget: tree.ida_star(heuristic, print_results, budget)),
+            "Retrograde": (RetrogradeSearchTree, lambda tree, heuristic, print_results, budget: tree.retrograde(print_results, budget))}
+
+# SearchTree keyword arguments only taken by the tree of some algorithms
+ALGORITHM_OPTIONS = {"Algorithm A": ["search_workers"], "IDA*": ["transposition_size"], "Weighted A*": ["weight"], "Beam": ["beam_width"]}
+
+# returns the (algorithm, heuristic) pairs run on every puzzle, in the order of the rows of analysis.csv
+def batch_algorithms(heuristics=BATCH_HEURISTICS, retrograde=False, ida=False, weighted=False, beam=False):
+    return ([("UCS", None)] +
+            [("GBFS", heuristic) for heuristic in heuristics] +
+            [("Algorithm A", heuristic) for heuristic in heuristics] +
+            ([("Weighted A*", heuristic) for heuristic in heuristics] if weighted else []) +
+            ([("Beam", heuristic) for heuristic in heuristics] if beam else []) +
+            ([("IDA*", heuristic) for heuristic in heuristics] if ida else []) +
+            ([("Retrograde", None)] if retrograde else []))
+
+"""
+Returns the name of an algorithm in analysis.csv and in the solution cache, with the weight or beam width of its
+tree options. The weight of weighted A* is also its suboptimality bound, unless the heuristic gives no bound.
+"""
+def algorithm_name(algorithm, tree_options, heuristic=None):
+    if algorithm == "Weighted A*":
+        weight = tree_options.get("weight", WeightedAStarSearchTree.DEFAULT_WEIGHT)
+        no_bound = "" if WeightedAStarSearchTree.bound(weight, heuristic) else ", no bound"
+        return algorithm + " (w=" + format(weight, "g") + no_bound + ")"
+    if algorithm == "Beam":
+        return algorithm + " (width=" + str(tree_options.get("beam_width", BeamSearchTree.DEFAULT_WIDTH)) + ")"
+    return algorithm
+
+CACHE_KEY_OPTIONS = {"search_workers": 1, "transposition_size": 0, "vectorized": False} # tree options that change the results of a search -> default
+
+"""
+Returns the name of an algorithm in the solution cache: its algorithm_name followed by the CACHE_KEY_OPTIONS of
+its tree options that apply to the algorithm and differ from their default, so a search run with other options
+is not answered from the cache.
+"""
+def cache_algorithm_name(algorithm, tree_options, heuristic=None):
+    options = [option + "=" + str(tree_options[option]) for option, default in CACHE_KEY_OPTIONS.items()
+               if tree_options.get(option, default) != default
+               and ((option in ALGORITHM_OPTIONS.get(algorithm, [])) or (option not in sum(ALGORITHM_OPTIONS.values(), [])))]
+    return " ".join([algorithm_name(algorithm, tree_options, heuristic)] + options)
+
+"""
+Solves one (puzzle, algorithm, heuristic) job of a batch.
+job is (puzzle number, puzzle fields, algorithm, heuristic, print_results, SearchBudget or None,
+dict of SearchTree keyword arguments, successor cache size or 0).
+Consecutive jobs of the same puzzle in a process share a SuccessorCache when the cache size is not 0.
+IDA* jobs without a budget are limited to IDA_MAX_EXPANSIONS expansions.
+With a "solution_cache" path in the tree options, finished searches are read from and saved to a SolutionCache
+(unless print_results is set: the search and solution files need a search to run).
+Returns the row of analysis.csv for the job.
+"""
+def solve_job(job):
+    puzzle_number, puzzle, algorithm, heuristic, print_results, budget, tree_options, cache_size = job
+    if (budget is None) and (algorithm == "IDA*"):
+        budget = SearchBudget(max_expansions=IDA_MAX_EXPANSIONS)
+    name = algorithm_name(algorithm, tree_options, heuristic)
+    cache_name = cache_algorithm_name(algorithm, tree_options, heuristic)
+    tree_options = dict(tree_options)
+    algorithm_options = {option: tree_options.pop(option) for options in ALGORITHM_OPTIONS.values() for option in options if option in tree_options}
+    solution_cache_path = tree_options.pop("solution_cache", None)
+    solution_cache_size = tree_options.pop("solution_cache_size", 100000)
+    if cache_size:
+        tree_options = dict(tree_options, successor_cache=SuccessorCache.for_puzzle(puzzle, cache_size))
+    for option in ALGORITHM_OPTIONS.get(algorithm, []): # options of the tree of this algorithm only
+        if option in algorithm_options:
+            tree_options[option] = algorithm_options[option]
+
+    solution_cache = None
+    results = None
+    if solution_cache_path and not print_results:
+        solution_cache = SolutionCache.for_path(solution_cache_path, solution_cache_size)
+        cached = solution_cache.lookup(puzzle, cache_name, heuristic)
+        if cached is not None:
+            results = cached[0]
+    if results is None:
+        tree_class, search = SEARCHES[algorithm]
+        tree = tree_class(puzzle, puzzle_number, **tree_options)
+        results = search(tree, heuristic, print_results, budget)
+        if solution_cache is not None:
+            solution_cache.store(puzzle, cache_name, heuristic, results, tree.solution_moves())
+    row = [puzzle_number, name, "N/A" if heuristic is None else "h" + str(heuristic)] + results + [results.describe()]
+    if tree_options.get("instrument"):
+        row += SearchStats.row(results.stats)
+    return row
+
+MAX_PENDING_TASKS = 4 # tasks queued per worker by run_batch
+
+# solves a list of jobs in order, returns their rows
+def solve_jobs(jobs):
+    return [solve_job(job) for job in jobs]
+
+"""
+Solves every (puzzle, algorithm, heuristic) job for an iterable of (puzzle number, puzzle fields).
+Jobs are sent to a pool of workers processes (run in this process when workers is 1).
+Every search is limited by budget (a SearchBudget or None) and its tree is created with tree_options.
+With a cache_size, the searches of a puzzle share a SuccessorCache (all jobs of a puzzle go to the same worker).
+Puzzles are consumed lazily: at most MAX_PENDING_TASKS tasks per worker are queued ahead of the rows
+yielded, so memory stays bounded for any number of puzzles.
+Yields the rows of analysis.csv in the same order as a serial run.
+"""
+def run_batch(puzzles, print_results=False, workers=1, budget=None, tree_options=None, cache_size=0, heuristics=BATCH_HEURISTICS, retrograde=False, ida=False,
+              weighted=False, beam=False):
+    tree_options = tree_options or {}
+    algorithms = batch_algorithms(heuristics, retrograde, ida, weighted, beam)
+    puzzle_jobs = ([(puzzle_number, puzzle, algorithm, heuristic, print_results, budget, tree_options, cache_size)
+                    for algorithm, heuristic in algorithms]
+                   for puzzle_number, puzzle in puzzles)
+    if workers <= 1:
+        for jobs in puzzle_jobs:
+            for job in jobs:
+                yield solve_job(job)
+    else:
+        with Pool(workers) as pool:
+            pending = deque() # results of the queued tasks, in order
+            for jobs in puzzle_jobs:
+                # a task is one job, or all the jobs of a puzzle when they share a SuccessorCache
+                for task in ([jobs] if cache_size else [[job] for job in jobs]):
+                    pending.append(pool.apply_async(solve_jobs, (task,)))
+                while len(pending) >= workers * MAX_PENDING_TASKS:
+                    yield from pending.popleft().get()
+            while pending:
+                yield from pending.popleft().get()
+
 # Runner
 if __name__ == '__main__':
-    # 2.2 Dealing with input file
-    puzzles_file = open('sample-input.txt', 'r')
-    # puzzles_file = open('puzzles.txt', 'r') # Full 50 puzzles file
-    lines = [line.strip() for line in puzzles_file.readlines() if line.strip()] # Removes empty lines
-    RushHour.print_board
-    puzzles_file.close()
+    parser = argparse.ArgumentParser(description="Solves Rush Hour puzzles with UCS, GBFS and Algorithm A and writes analysis.csv")
+    parser.add_argument("input", nargs="?", default="sample-input.txt", help="puzzle file (puzzles.txt has the full 50 puzzles)")
+    parser.add_argument("--heuristics", type=lambda value: [int(h) for h in value.split(",")], default=BATCH_HEURISTICS,
+                        help="comma-separated heuristics run with GBFS and Algorithm A (1-4 as in the handout, 5-6 blocker graph, 7 pattern database, 8 retrograde table)")
+    parser.add_argument("--retrograde", action="store_true", help="also solve every puzzle from its retrograde table of distances")
+    parser.add_argument("--ida", action="store_true", help="also run IDA* with every heuristic (limited to 200000 expansions without --timeout, --max-expansions or --max-memory)")
+    parser.add_argument("--transposition-table", type=int, default=0, help="states kept in the transposition table of IDA* (0 disables it)")
+    parser.add_argument("--weighted", type=float, default=None, metavar="W", help="also run weighted A* (f = g + W * h, solutions within W x optimal with h1, h7 or h8) with every heuristic")
+    parser.add_argument("--beam", type=int, default=None, metavar="WIDTH", help="also run beam search keeping WIDTH nodes per level with every heuristic")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--search-workers", type=int, default=1, help="processes of a parallel Algorithm A search on every puzzle (needs --workers 1)")
+    parser.add_argument("--timeout", type=float, default=None, help="time limit of every search (in seconds)")
+    parser.add_argument("--max-expansions", type=int, default=None, help="maximum number of expansions of every search")
+    parser.add_argument("--max-memory", type=float, default=None, help="approximate memory limit of every search (in MB)")
+    parser.add_argument("--print-results", action="store_true", help="write search and solution files to outputs/")
+    parser.add_argument("--vectorized", action="store_true", help="generate and score children with NumPy (ignored if NumPy is not installed)")
+    parser.add_argument("--successor-cache", type=int, default=0, help="states kept in the successor cache shared by the searches of a puzzle (0 disables it)")
+    parser.add_argument("--solution-cache", default=None, help="SQLite file caching the results of finished searches (ignored with --print-results)")
+    parser.add_argument("--solution-cache-size", type=int, default=100000, help="results kept in the solution cache")
+    parser.add_argument("--stats", action="store_true", help="instrument the searches and add their counters to analysis.csv")
+    parser.add_argument("--compress-output", action="store_true", help="gzip the search and solution files")
+    parser.add_argument("--search-sample", type=int, default=1, help="write only every Nth expansion to the search files")
+    args = parser.parse_args()
+    unknown_heuristics = [heuristic for heuristic in args.heuristics if heuristic not in SearchTree.HEURISTICS]
+    if unknown_heuristics:
+        parser.error("unknown heuristic " + ", ".join(str(heuristic) for heuristic in unknown_heuristics))
+    if (args.workers > 1) and (args.search_workers > 1): # the processes of a pool cannot start processes
+        parser.error("--search-workers needs --workers 1")
 
     # setting up csv file for data analysis
-    analysis_header = ["Puzzle Number", "Algorithm", "Heuristic", "Length of the Solution", "Length of the Search Path", "Execution Time (in seconds)"]
+    analysis_header = ["Puzzle Number", "Algorithm", "Heuristic", "Length of the Solution", "Length of the Search Path", "Execution Time (in seconds)", "Status"]
     analysis_file = open('analysis.csv', 'w', encoding='UTF8', newline='')
     writer = csv.writer(analysis_file)
+    if args.stats: analysis_header += SearchStats.COLUMNS
     writer.writerow(analysis_header)
 
-    print_results = False # set to true if need output files
+    print_results = args.print_results # set to true if need output files
 
-    puzzle_counter = 1
-    for line in lines:
-        if not line.startswith('#'): # skips over comment lines
-            try:
-                # UCS
-                ucs_search = UCSSearchTree(line.split(), puzzle_counter)
-                ucs_results = ucs_search.run(print_results)
-                ucs_data = [puzzle_counter, "UCS", "N/A"] + ucs_results
-                writer.writerow(ucs_data)
-
-                # GBFS
-                GBFS_search = GBFSSearchTree(line.split(), puzzle_counter)
-                GBFS_h1_results = GBFS_search.run_GBFS(1, print_results)
-                GBFS_h1_data = [puzzle_counter, "GBFS", "h1"] + GBFS_h1_results
-                GBFS_h2_results = GBFS_search.run_GBFS(2, print_results)
-                GBFS_h2_data = [puzzle_counter, "GBFS", "h2"] + GBFS_h2_results
-                GBFS_h3_results = GBFS_search.run_GBFS(3, print_results)
-                GBFS_h3_data = [puzzle_counter, "GBFS", "h3"] + GBFS_h3_results
-                GBFS_h4_results = GBFS_search.run_GBFS(4, print_results)
-                GBFS_h4_data = [puzzle_counter, "GBFS", "h4"] + GBFS_h4_results
-                writer.writerow(GBFS_h1_data)
-                writer.writerow(GBFS_h2_data)
-                writer.writerow(GBFS_h3_data)
-                writer.writerow(GBFS_h4_data)
-
-                # A
-                algorithm_a_search = AlgorithmASearchTree(line.split(), puzzle_counter)
-                algorithm_a_h1_results = algorithm_a_search.run_algorithm_A(1, print_results)
-                algorithm_a_h1_data = [puzzle_counter, "Algorithm A", "h1"] + algorithm_a_h1_results
-                algorithm_a_h2_results = algorithm_a_search.run_algorithm_A(2, print_results)
-                algorithm_a_h2_data = [puzzle_counter, "Algorithm A", "h2"] + algorithm_a_h2_results
-                algorithm_a_h3_results = algorithm_a_search.run_algorithm_A(3, print_results)
-                algorithm_a_h3_data = [puzzle_counter, "Algorithm A", "h3"] + algorithm_a_h3_results
-                algorithm_a_h4_results = algorithm_a_search.run_algorithm_A(4, print_results)
-                algorithm_a_h4_data = [puzzle_counter, "Algorithm A", "h4"] + algorithm_a_h4_results
-                writer.writerow(algorithm_a_h1_data)
-                writer.writerow(algorithm_a_h2_data)
-                writer.writerow(algorithm_a_h3_data)
-                writer.writerow(algorithm_a_h4_data)
-
-            except ValueError:
-                print("Puzzle #" + str(puzzle_counter) + " is not configured properly")
-            except Exception as e: print(e)
-            puzzle_counter += 1
-    analysis_file.close()
\ No newline at end of file
+    budget = None
+    if (args.timeout is not None) or (args.max_expansions is not None) or (args.max_memory is not None):
+        budget = SearchBudget(args.max_expansions, args.timeout, None if args.max_memory is None else int(args.max_memory * 1024 * 1024))
+
+    tree_options = {"compress_output": args.compress_output, "search_sample": args.search_sample, "vectorized": args.vectorized,
+                    "transposition_size": args.transposition_table, "instrument": args.stats,
+                    "weight": WeightedAStarSearchTree.DEFAULT_WEIGHT if args.weighted is None else args.weighted,
+                    "beam_width": BeamSearchTree.DEFAULT_WIDTH if args.beam is None else args.beam,
+                    "search_workers": args.search_workers,
+                    "solution_cache": args.solution_cache, "solution_cache_size": args.solution_cache_size}
+
+    # 2.2 Dealing with input file: puzzles are read lazily and checked before their searches are queued
+    def valid_puzzles(records):
+        for record in records:
+            if record.error is not None:
+                print("Puzzle #" + str(record.number) + " (line " + str(record.line_number) + ") is not configured properly: " + record.error)
+                continue
+            if 7 in args.heuristics: # build the pattern database before the workers map it
+                PatternDatabase(RushHour(record.fields))
+            yield record.number, record.fields
+
+    for row in run_batch(valid_puzzles(read_puzzles(args.input)), print_results, args.workers, budget, tree_options, args.successor_cache, args.heuristics, args.retrograde, args.ida,
+                         args.weighted is not None, args.beam is not None):
+        writer.writerow(row)
+    analysis_file.close()
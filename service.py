@@ -0,0 +1,275 @@
+from collections import OrderedDict
+from multiprocessing import get_context
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from rushhour import RushHour, SearchBudget, SearchResult, SuccessorCache, SolutionCache, SearchTree, SEARCHES, ALGORITHM_OPTIONS, algorithm_name, cache_algorithm_name
+
+# Resident solver service: reads JSON requests (one per line) from stdin or from the connections of a local socket
+# and solves them on a pool of worker processes that stay up between requests.
+# A request is {"id": any, "puzzle": "<board> [fuel overrides]", "algorithm": "UCS" | "GBFS" | "Algorithm A" | "Weighted A*" |
+# "Beam" | "IDA*" | "Retrograde", "heuristic": number (all but UCS and Retrograde), "timeout": seconds (optional)}, with the
+# optional "weight" (Weighted A*), "beam_width" (Beam) or "transposition_size" (IDA*) of the search.
+# The response line has the id, status, solution length, search path length, time and the solution path in the
+# format of the *-sol-N.txt files ("car action moves; " for every move), or an error.
+
+TABLE_CACHE_SIZE = 32 # retrograde tables kept warm by every worker
+SUCCESSOR_CACHE_PUZZLES = 8 # puzzles whose successor caches are kept warm by every worker
+SUCCESSOR_CACHE_SIZE = 100000 # states in the successor cache of a puzzle
+SOLUTION_CACHE_SIZE = 100000 # results kept in the solution cache (with --solution-cache)
+NO_HEURISTIC_ALGORITHMS = ("UCS", "Retrograde") # algorithms that ignore the heuristic of a request
+TIMEOUT_GRACE = 5 # seconds a worker is given past the timeout of a request before the service gives up on it
+
+# warm state of a worker process, kept between requests (pattern databases stay mapped in PatternDatabase.tables)
+retrograde_tables = OrderedDict() # puzzle string -> complete RetrogradeTable
+successor_caches = OrderedDict() # puzzle string -> SuccessorCache
+
+# returns the value cached for key in an LRU cache (creating it with make), evicting beyond size entries
+def cached(cache, key, size, make):
+    value = cache.get(key)
+    if value is None:
+        value = cache[key] = make()
+        if len(cache) > size:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return value
+
+"""
+Solves one request in a worker process. The search is limited by a SearchBudget of the request timeout,
+so a hard puzzle gives its worker back when its time is up. With a solution_cache path, finished searches
+are read from and saved to a SolutionCache.
+Returns the response of the request.
+"""
+def solve_request(request, timeout, solution_cache_path=None):
+    response = {"id": request.get("id")}
+    puzzle = str(request.get("puzzle", "")).split()
+    algorithm = request.get("algorithm", "Algorithm A")
+    heuristic = request.get("heuristic")
+    error = RushHour.check_puzzle(puzzle)
+    if (error is None) and (algorithm not in SEARCHES):
+        error = "unknown algorithm " + str(algorithm)
+    if algorithm in NO_HEURISTIC_ALGORITHMS:
+        heuristic = None
+    elif (error is None) and ((type(heuristic) is not int) or (heuristic not in SearchTree.HEURISTICS)):
+        error = "unknown heuristic " + json.dumps(heuristic)
+    if error is not None:
+        response["error"] = error
+        return response
+
+    options = {option: request[option] for option in ALGORITHM_OPTIONS.get(algorithm, []) if option in request}
+    cache_name = cache_algorithm_name(algorithm, options, heuristic)
+    response["algorithm"] = algorithm_name(algorithm, options, heuristic) # with the weight (and bound) of weighted A* or the width of beam search
+    solution_cache = None
+    if solution_cache_path is not None:
+        solution_cache = SolutionCache.for_path(solution_cache_path, SOLUTION_CACHE_SIZE)
+        cached_result = solution_cache.lookup(puzzle, cache_name, heuristic)
+        if cached_result is not None:
+            return make_response(response, cached_result[0], cached_result[1])
+
+    key = " ".join(puzzle)
+    tree_class, search = SEARCHES[algorithm]
+    successor_cache = cached(successor_caches, key, SUCCESSOR_CACHE_PUZZLES, lambda: SuccessorCache(SUCCESSOR_CACHE_SIZE))
+    tree = tree_class(puzzle, request.get("id"), successor_cache=successor_cache, **options)
+    if (algorithm == "Retrograde") or (heuristic == 8):
+        tree.retrograde_table = retrograde_tables.get(key)
+    try:
+        results = search(tree, heuristic, False, SearchBudget(max_time=timeout))
+    except Exception as e: # keeps the worker serving the other requests
+        response["error"] = repr(e)
+        return response
+    if (tree.retrograde_table is not None) and tree.retrograde_table.complete:
+        cached(retrograde_tables, key, TABLE_CACHE_SIZE, lambda: tree.retrograde_table)
+    if solution_cache is not None:
+        solution_cache.store(puzzle, cache_name, heuristic, results, tree.solution_moves())
+    return make_response(response, results, tree.solution_moves())
+
+# adds a SearchResult and its (car, action, moves) moves to a response
+def make_response(response, results, moves):
+    response.update({"status": results.describe(),
+                     "solution_length": results[0],
+                     "search_path_length": results[1],
+                     "time": results[2]})
+    if results.status == SearchResult.SOLVED:
+        response["solution"] = SearchTree.format_moves(moves)
+    return response
+
+# solves the (request, timeout) pairs received on a connection until it is closed (loop of a WorkerProcess)
+def serve_requests(connection, solution_cache_path):
+    while True:
+        try:
+            request, timeout = connection.recv()
+        except EOFError:
+            return
+        connection.send(solve_request(request, timeout, solution_cache_path))
+
+class WorkerProcess:
+    """
+    WorkerProcess is one worker of the service: a process solving the requests sent through a pipe, one at a time,
+    and keeping its caches warm between them. A request still running TIMEOUT_GRACE seconds past its timeout (a
+    search or table that missed its budget) cannot be cancelled, so the process is killed and replaced: the worker
+    is free again for the other requests.
+    """
+
+    def __init__(self, solution_cache_path=None):
+        self.solution_cache_path = solution_cache_path
+        self.start()
+
+    # starts the process and the pipe to it
+    def start(self):
+        self.connection, child_connection = get_context().Pipe()
+        self.process = get_context().Process(target=serve_requests, args=(child_connection, self.solution_cache_path), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    # kills the process (whatever it is running) and starts a new one
+    def restart(self):
+        self.close()
+        self.start()
+
+    def close(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    """
+        Solves a request in the process and returns its response. Raises asyncio.TimeoutError (after restarting the
+        process) if no response comes within timeout + TIMEOUT_GRACE seconds, and EOFError if the process died.
+    """
+    async def solve(self, request, timeout):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        if not self.process.is_alive(): # died between two requests
+            self.restart()
+        self.connection.send((request, timeout))
+        loop.add_reader(self.connection.fileno(), lambda: ready.done() or ready.set_result(None))
+        try:
+            await asyncio.wait_for(ready, timeout + TIMEOUT_GRACE)
+        except asyncio.TimeoutError:
+            loop.remove_reader(self.connection.fileno())
+            self.restart()
+            raise
+        loop.remove_reader(self.connection.fileno())
+        try:
+            return self.connection.recv()
+        except EOFError:
+            self.restart()
+            raise
+
+class SolverService:
+    """
+    SolverService queues the requests of every input stream and runs them on a pool of WorkerProcess.
+    The queue holds at most max_pending requests: when it is full, the service stops reading its inputs until a
+    worker takes a request (backpressure). As many requests run at a time as there are workers, each limited by its
+    timeout, so a hard puzzle only holds one worker while the cheap ones keep flowing through the others (and a
+    worker stuck past its timeout is replaced).
+    Responses are written as soon as they are ready (in completion order, matched to requests by id).
+    """
+
+    def __init__(self, workers, max_pending, timeout, solution_cache=None):
+        self.timeout = timeout
+        self.queue = asyncio.Queue(max_pending) # (request, write function of the response)
+        self.workers = [WorkerProcess(solution_cache) for _ in range(workers)] # solution_cache: path shared by the workers
+
+    # takes requests from the queue and solves them on worker, until cancelled
+    async def run_worker(self, worker):
+        while True:
+            request, write = await self.queue.get()
+            try:
+                try:
+                    response = await worker.solve(request, request.get("timeout", self.timeout))
+                except asyncio.TimeoutError:
+                    response = {"id": request.get("id"), "status": SearchResult.BUDGET_EXCEEDED + " (max_time)"}
+                except EOFError:
+                    response = {"id": request.get("id"), "error": "worker process exited"}
+                await write(response)
+            finally:
+                self.queue.task_done()
+
+    # reads the requests of a stream (one JSON object per line, readline returns an awaitable of the next line) into the queue
+    async def read_requests(self, readline, write):
+        while True:
+            line = await readline()
+            if not line: break
+            line = line.strip()
+            if not line: continue
+            request = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict): raise ValueError("request is not an object")
+                if "timeout" in request:
+                    request["timeout"] = self.parse_timeout(request["timeout"])
+            except ValueError as e:
+                await write({"id": request.get("id") if isinstance(request, dict) else None, "error": "invalid request: " + str(e)})
+                continue
+            await self.queue.put((request, write)) # waits while the queue is full
+
+    # returns the timeout of a request in seconds (a positive number), raises ValueError otherwise
+    @staticmethod
+    def parse_timeout(timeout):
+        if (type(timeout) not in (int, float)) or not (0 < timeout < float('inf')):
+            raise ValueError("timeout must be a positive number of seconds")
+        return float(timeout)
+
+    # serves the requests of stdin until its end, writing the responses to stdout
+    async def serve_stdin(self):
+        loop = asyncio.get_running_loop()
+
+        # stdin is read by a thread so that files work as well as pipes and terminals
+        def readline():
+            return loop.run_in_executor(None, sys.stdin.buffer.readline)
+
+        async def write(response):
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+
+        workers = [asyncio.create_task(self.run_worker(worker)) for worker in self.workers]
+        await self.read_requests(readline, write)
+        await self.queue.join()
+        for worker in workers: worker.cancel()
+
+    # serves the requests of every connection to a local socket (a unix socket path, or a TCP port on localhost)
+    async def serve_socket(self, path=None, port=None):
+        async def handle_connection(reader, writer):
+            async def write(response):
+                if writer.is_closing(): return
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+            await self.read_requests(reader.readline, write)
+
+        workers = [asyncio.create_task(self.run_worker(worker)) for worker in self.workers]
+        if path is not None:
+            server = await asyncio.start_unix_server(handle_connection, path)
+        else:
+            server = await asyncio.start_server(handle_connection, "127.0.0.1", port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+
+# Runner
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Solves Rush Hour puzzles sent as JSON lines on stdin or on a local socket")
+    parser.add_argument("--socket", default=None, help="path of a unix socket to listen on (default: read stdin)")
+    parser.add_argument("--port", type=int, default=None, help="TCP port to listen on, on localhost (default: read stdin)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--max-pending", type=int, default=64, help="requests queued before the service stops reading its input")
+    parser.add_argument("--timeout", type=float, default=10.0, help="default time limit of a request (in seconds)")
+    parser.add_argument("--solution-cache", default=None, help="SQLite file caching the results of finished searches")
+    args = parser.parse_args()
+
+    service = SolverService(args.workers, args.max_pending, args.timeout, args.solution_cache)
+    try:
+        if (args.socket is None) and (args.port is None):
+            asyncio.run(service.serve_stdin())
+        else:
+            asyncio.run(service.serve_socket(args.socket, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
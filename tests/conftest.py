@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import rushhour
+
+
+# returns the fields of every valid puzzle of a puzzle file of the repository
+def read_fields(name):
+    return [record.fields for record in rushhour.read_puzzles(os.path.join(ROOT, name)) if record.error is None]
+
+
+@pytest.fixture(scope="session")
+def sample_puzzles():
+    return read_fields("sample-input.txt")
+
+
+@pytest.fixture(scope="session")
+def puzzles():
+    return read_fields("puzzles.txt")
+
+
+@pytest.fixture(scope="session")
+def ucs_lengths(puzzles):
+    # optimal solution lengths of puzzles.txt, which the admissible heuristics have to reach
+    return [rushhour.UCSSearchTree(puzzle, number).uniform_cost_search(False)[0] for number, puzzle in enumerate(puzzles, 1)]
@@ -0,0 +1,56 @@
+import rushhour
+
+
+# returns the packed fuel of a bitboard holding the fuel of every car
+def pack(bitboard, fuels):
+    return sum(fuel << (car * bitboard.fuel_bits) for car, fuel in enumerate(fuels))
+
+
+# returns a node with the layout of the root of tree, the fuel of every car and cost g
+def node(tree, fuels, g):
+    state = (tree.root.state[0], pack(tree.puzzle.bitboard, fuels))
+    return rushhour.SearchNode(state, None, None, None, None, g, 0)
+
+
+def test_has_more_fuel_compares_every_car(puzzles):
+    bitboard = rushhour.RushHour(puzzles[0]).bitboard
+    cars = len(bitboard.geometry)
+    fuels = [100] * cars
+    assert bitboard.has_more_fuel(pack(bitboard, fuels), pack(bitboard, fuels))
+    assert bitboard.has_more_fuel(pack(bitboard, fuels), pack(bitboard, [99] + fuels[1:]))
+    assert not bitboard.has_more_fuel(pack(bitboard, [99] + fuels[1:]), pack(bitboard, fuels))
+    # incomparable fuels: neither dominates the other
+    first, last = pack(bitboard, [0] + fuels[1:]), pack(bitboard, fuels[:-1] + [0])
+    assert not bitboard.has_more_fuel(first, last)
+    assert not bitboard.has_more_fuel(last, first)
+
+
+def test_closed_state_dominates_states_with_less_fuel(puzzles):
+    tree = rushhour.UCSSearchTree(puzzles[0], 1)
+    cars = len(tree.puzzle.bitboard.geometry)
+    tree.close(node(tree, [50] * cars, 3))
+    assert tree.is_closed(node(tree, [50] * cars, 3))
+    assert tree.is_closed(node(tree, [40] + [50] * (cars - 1), 5))
+    assert not tree.is_closed(node(tree, [60] + [50] * (cars - 1), 5))
+    assert not tree.is_closed(node(tree, [60] + [40] * (cars - 1), 5))
+
+
+def test_close_keeps_the_pareto_front_of_a_layout(puzzles):
+    tree = rushhour.UCSSearchTree(puzzles[0], 1)
+    cars = len(tree.puzzle.bitboard.geometry)
+    tree.close(node(tree, [40] * cars, 3))
+    tree.close(node(tree, [60] + [30] * (cars - 1), 3)) # incomparable with the first entry
+    assert len(tree.visited[tree.root.state[0]]) == 2
+    tree.close(node(tree, [60] * cars, 3)) # dominates both entries
+    assert tree.visited[tree.root.state[0]] == [(pack(tree.puzzle.bitboard, [60] * cars), 3)]
+
+
+def test_reopened_search_only_prunes_states_reached_at_a_higher_cost(puzzles):
+    tree = rushhour.AlgorithmASearchTree(puzzles[0], 1)
+    tree.reopen = True
+    cars = len(tree.puzzle.bitboard.geometry)
+    tree.close(node(tree, [50] * cars, 3))
+    assert tree.is_closed(node(tree, [40] * cars, 4))
+    assert not tree.is_closed(node(tree, [40] * cars, 2))
+    tree.close(node(tree, [50] * cars, 2)) # same fuel at a lower cost replaces the entry
+    assert tree.visited[tree.root.state[0]] == [(pack(tree.puzzle.bitboard, [50] * cars), 2)]
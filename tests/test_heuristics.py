@@ -0,0 +1,21 @@
+import pytest
+
+import rushhour
+
+
+# returns the solution lengths of Algorithm A on every puzzle
+def algorithm_A_lengths(puzzles, heuristic, **kwargs):
+    return [rushhour.AlgorithmASearchTree(puzzle, number).algorithm_A(heuristic, False, **kwargs)[0]
+            for number, puzzle in enumerate(puzzles, 1)]
+
+
+@pytest.mark.parametrize("heuristic", [5, 6])
+def test_blocker_graph_heuristics_find_optimal_solutions(puzzles, ucs_lengths, heuristic):
+    assert algorithm_A_lengths(puzzles, heuristic) == ucs_lengths
+
+
+@pytest.mark.parametrize("heuristic", [5, 6])
+def test_blocker_graph_heuristics_never_overestimate_the_root(puzzles, ucs_lengths, heuristic):
+    for number, (puzzle, length) in enumerate(zip(puzzles, ucs_lengths), 1):
+        tree = rushhour.AlgorithmASearchTree(puzzle, number)
+        assert tree.heuristics[heuristic](tree.root) <= length, number
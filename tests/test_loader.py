@@ -0,0 +1,43 @@
+import pytest
+
+import rushhour
+
+BOARD = "BBIJ....IJCC..IAAMGDDK.MGH.KL.GHFFL."
+
+
+@pytest.mark.parametrize("fields, error", [
+    ([], "empty puzzle"),
+    (["BBIJ....IJCC..IAAMGDDK.MGH.KL.GHFF"], "board has 34 cells, which is not a square (separate the rows of other boards with '/')"),
+    (["BB..../AA..../C"], "rows of the board have different widths"),
+    (["A/A"], "board is 1x2"),
+    (["BBIJ....IJCC..IAAMGDDK.MGH.KL.GHFFL1"], "invalid character '1'"),
+    (["BBIJ....IJCC..IAAMGDDK.MGH.KL.GHFFLB"], "car B is not a straight line of at least 2 cells"),
+    (["BBIJ....IJCC..I..MGDDK.MGH.KL.GHFFL."], "no ambulance"),
+    (["BBIJAA..IJCC..I..MGDDK.MGH.KL.GHFFL."], "Ambulance not properly placed on the board"),
+    ([BOARD, "B"], "invalid fuel 'B'"),
+    ([BOARD, "Bx"], "invalid fuel 'Bx'"),
+    ([BOARD, "Z4"], "fuel of car Z which is not on the board"),
+])
+def test_check_puzzle_reports_the_reason(fields, error):
+    assert rushhour.RushHour.check_puzzle(fields) == error
+
+
+@pytest.mark.parametrize("fields", [[BOARD], [BOARD, "B4", "A0"], ["BB..C./D...C./DAA.../D...../.EEE.."], ["." * 24 + "...AA..." + "." * 32]])
+def test_check_puzzle_accepts_valid_puzzles(fields):
+    assert rushhour.RushHour.check_puzzle(fields) is None
+
+
+def test_read_puzzles_reports_bad_lines_and_keeps_going(tmp_path):
+    path = tmp_path / "puzzles.txt"
+    path.write_text("# comment\n"
+                    "\n"
+                    + BOARD + " B4\n"
+                    "   BBIJ....IJCC..I..MGDDK.MGH.KL.GHFFL.\n"
+                    "# another comment\n"
+                    + BOARD + " Z4\n"
+                    + BOARD)
+    records = list(rushhour.read_puzzles(str(path)))
+    assert [(record.number, record.line_number, record.error) for record in records] == [
+        (1, 3, None), (2, 4, "no ambulance"), (3, 6, "fuel of car Z which is not on the board"), (4, 7, None)]
+    assert records[0].fields == [BOARD, "B4"]
+
@@ -0,0 +1,51 @@
+import rushhour
+
+
+# returns a node of state with the given g (the other fields are not used by OpenList)
+def node(state, g):
+    return rushhour.SearchNode(state, None, None, None, None, g, 0)
+
+
+def by_g(node):
+    return node.g
+
+
+def test_pops_lowest_priority_first():
+    open_list = rushhour.OpenList(by_g, [node("a", 3), node("b", 1), node("c", 2)])
+    assert [open_list.pop().state for _ in range(3)] == ["b", "c", "a"]
+    assert open_list.pop() is None
+
+
+def test_ties_are_first_in_first_out():
+    open_list = rushhour.OpenList(by_g, [node(state, 1) for state in "abcd"])
+    assert [open_list.pop().state for _ in range(4)] == list("abcd")
+
+
+def test_push_replaces_the_open_node_of_a_state():
+    first, better = node("a", 5), node("a", 2)
+    open_list = rushhour.OpenList(by_g, [first, node("b", 3)])
+    open_list.push(better)
+    assert len(open_list) == 2
+    assert "a" in open_list
+    assert open_list.get("a") is better
+    assert open_list.pop() is better
+    assert open_list.pop().state == "b"
+    assert open_list.pop() is None # the replaced entry of "a" is stale
+    assert len(open_list) == 0
+
+
+def test_peek_skips_stale_entries():
+    open_list = rushhour.OpenList(by_g, [node("a", 1), node("b", 4)])
+    open_list.push(node("a", 6))
+    assert open_list.peek() == 4
+    assert open_list.pop().state == "b"
+    assert open_list.peek() == 6
+    assert rushhour.OpenList(by_g).peek() is None
+
+
+def test_has_lower_cost_in_open(puzzles):
+    tree = rushhour.UCSSearchTree(puzzles[0], 1)
+    tree.open = rushhour.OpenList(tree.PRIORITY_G, [node(tree.root.state, 2)])
+    assert tree.has_lower_cost_in_open(node(tree.root.state, 2))
+    assert tree.has_lower_cost_in_open(node(tree.root.state, 3))
+    assert not tree.has_lower_cost_in_open(node(tree.root.state, 1))
@@ -0,0 +1,27 @@
+import rushhour
+
+
+def test_parallel_search_finds_optimal_solutions(puzzles, ucs_lengths):
+    lengths = [rushhour.AlgorithmASearchTree(puzzle, number).algorithm_A(5, False, workers=2)[0] for number, puzzle in enumerate(puzzles, 1)]
+    assert lengths == ucs_lengths
+
+
+def test_expansion_budget_is_shared_by_the_workers(puzzles):
+    tree = rushhour.AlgorithmASearchTree(puzzles[0], 1)
+    results = tree.algorithm_A(5, False, budget=rushhour.SearchBudget(max_expansions=100), workers=3)
+    assert results.status == rushhour.SearchResult.BUDGET_EXCEEDED
+    assert results.reason == "max_expansions"
+    assert results[1] == 100
+
+
+def test_stats_and_search_file_cover_every_worker(tmp_path, monkeypatch, puzzles, ucs_lengths):
+    monkeypatch.setattr(rushhour.os.path, "realpath", lambda path: str(tmp_path / "rushhour.py"))
+    (tmp_path / "outputs").mkdir()
+    tree = rushhour.AlgorithmASearchTree(puzzles[1], 2, instrument=True)
+    results = tree.algorithm_A(5, True, workers=2)
+    assert results[0] == ucs_lengths[1]
+    assert results.stats.expanded == results[1] == tree.closed_count
+    assert results.stats.generated == tree.generated_count
+    lines = (tmp_path / "outputs" / "a-h5-search-2.txt").read_text().split("\n")
+    assert len(lines) == results[1] + 1 # every expansion, then the goal
+    assert sorted(path.name for path in (tmp_path / "outputs").iterdir()) == ["a-h5-search-2.txt", "a-h5-sol-2.txt"]
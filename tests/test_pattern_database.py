@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+import rushhour
+
+
+@pytest.fixture
+def pdb_directory(tmp_path, monkeypatch):
+    # builds the tables in a directory of the test, without the tables mapped by the other tests
+    monkeypatch.setattr(rushhour.PatternDatabase, "DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(rushhour.PatternDatabase, "tables", {})
+    return tmp_path
+
+
+# returns the pattern database of a puzzle (building its table if its file is missing or not valid)
+def database(puzzle, budget=None):
+    return rushhour.PatternDatabase(rushhour.RushHour(puzzle), budget)
+
+
+# rewrites part of a table file
+def patch_file(path, offset, data):
+    with open(path, "r+b") as table_file:
+        table_file.seek(offset)
+        table_file.write(data)
+
+
+def test_built_table_is_saved_with_a_valid_header(pdb_directory, puzzles):
+    pdb = database(puzzles[0])
+    assert pdb.complete
+    assert os.path.dirname(pdb.path) == str(pdb_directory)
+    assert rushhour.PatternDatabase.is_valid_file(pdb.path, pdb.signature, pdb.entries)
+    assert not rushhour.PatternDatabase.is_valid_file(pdb.path, pdb.signature + "x", pdb.entries)
+    assert not rushhour.PatternDatabase.is_valid_file(pdb.path, pdb.signature, pdb.entries + 1)
+    assert not rushhour.PatternDatabase.is_valid_file(str(pdb_directory / "missing.pdb"), pdb.signature, pdb.entries)
+
+
+@pytest.mark.parametrize("corruption", ["magic", "version", "truncated", "extended", "signature"])
+def test_invalid_file_is_rebuilt(pdb_directory, puzzles, corruption):
+    pdb = database(puzzles[0])
+    with open(pdb.path, "rb") as table_file:
+        content = table_file.read()
+    rushhour.PatternDatabase.tables.clear() # as in a new process
+    if corruption == "magic":
+        patch_file(pdb.path, 0, b"XXXXX")
+    elif corruption == "version":
+        patch_file(pdb.path, 5, bytes([rushhour.PatternDatabase.VERSION + 1]))
+    elif corruption == "truncated":
+        with open(pdb.path, "r+b") as table_file:
+            table_file.truncate(len(content) - 1)
+    elif corruption == "extended":
+        with open(pdb.path, "ab") as table_file:
+            table_file.write(b"\0")
+    else:
+        patch_file(pdb.path, rushhour.PatternDatabase.HEADER.size, b"?")
+    assert not rushhour.PatternDatabase.is_valid_file(pdb.path, pdb.signature, pdb.entries)
+    with pytest.raises(ValueError):
+        rushhour.PatternDatabase.open_table(pdb.path, pdb.signature, pdb.entries)
+
+    rebuilt = database(puzzles[0])
+    assert rebuilt.complete
+    with open(rebuilt.path, "rb") as table_file:
+        assert table_file.read() == content
+
+
+def test_build_stopped_by_the_budget_saves_nothing(pdb_directory, puzzles):
+    budget = rushhour.SearchBudget(max_time=0)
+    budget.start(rushhour.AlgorithmASearchTree(puzzles[0], 1).root)
+    pdb = database(puzzles[0], budget)
+    assert not pdb.complete
+    assert os.listdir(pdb_directory) == []
+
+
+def test_pattern_database_finds_optimal_solutions(pdb_directory, puzzles, ucs_lengths):
+    lengths = [rushhour.AlgorithmASearchTree(puzzle, number).algorithm_A(7, False)[0] for number, puzzle in enumerate(puzzles, 1)]
+    assert lengths == ucs_lengths
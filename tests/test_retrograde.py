@@ -0,0 +1,47 @@
+import pytest
+
+import rushhour
+
+
+@pytest.fixture(scope="module")
+def tables(puzzles):
+    # retrograde table of every puzzle, built once for the tests of the module
+    return [rushhour.RetrogradeTable(rushhour.RushHour(puzzle).bitboard) for puzzle in puzzles]
+
+
+def test_exact_distances_are_the_optimal_solution_lengths(tables, ucs_lengths):
+    unknown = 0
+    for number, (retrograde_table, length) in enumerate(zip(tables, ucs_lengths), 1):
+        state = retrograde_table.bitboard.initial_state
+        assert retrograde_table.complete
+        assert retrograde_table.distance(state) <= length, number
+        distance = retrograde_table.exact_distance(state)
+        if distance == rushhour.RetrogradeTable.UNKNOWN:
+            unknown += 1
+        else:
+            assert distance == length, number
+    assert unknown # some puzzles of puzzles.txt have too little fuel for the table distance
+
+
+def test_next_moves_walk_an_optimal_solution(tables, ucs_lengths):
+    for number, (retrograde_table, length) in enumerate(zip(tables, ucs_lengths), 1):
+        state = retrograde_table.bitboard.initial_state
+        moves = retrograde_table.next_moves(state)
+        if moves == rushhour.RetrogradeTable.UNKNOWN: continue
+        for _ in range(length):
+            assert moves and (moves != rushhour.RetrogradeTable.UNKNOWN), number
+            state = moves[0][3]
+            moves = retrograde_table.next_moves(state)
+        assert retrograde_table.bitboard.is_end(state), number
+        assert moves == []
+
+
+@pytest.mark.parametrize("algorithm, heuristic", [("Retrograde", None), ("Algorithm A", 8)])
+def test_retrograde_searches_find_optimal_solutions(puzzles, tables, ucs_lengths, algorithm, heuristic):
+    tree_class, search = rushhour.SEARCHES[algorithm]
+    lengths = []
+    for number, (puzzle, retrograde_table) in enumerate(zip(puzzles, tables), 1):
+        tree = tree_class(puzzle, number)
+        tree.retrograde_table = retrograde_table
+        lengths.append(search(tree, heuristic, False, None)[0])
+    assert lengths == ucs_lengths
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import multiprocessing
+import time
+
+import pytest
+
+import rushhour
+import service
+
+BOARD = "BBIJ....IJCC..IAAMGDDK.MGH.KL.GHFFL."
+
+
+@pytest.mark.parametrize("request_fields, error", [
+    ({"puzzle": ""}, "empty puzzle"),
+    ({"puzzle": "BBIJ....IJCC..I..MGDDK.MGH.KL.GHFFL."}, "no ambulance"),
+    ({"puzzle": BOARD, "algorithm": "DFS", "heuristic": 1}, "unknown algorithm DFS"),
+    ({"puzzle": BOARD, "algorithm": "Algorithm A"}, "unknown heuristic null"),
+    ({"puzzle": BOARD, "algorithm": "GBFS", "heuristic": 9}, "unknown heuristic 9"),
+    ({"puzzle": BOARD, "algorithm": "GBFS", "heuristic": "1"}, 'unknown heuristic "1"'),
+    ({"puzzle": BOARD, "algorithm": "GBFS", "heuristic": True}, "unknown heuristic true"),
+])
+def test_invalid_requests_get_an_error(request_fields, error):
+    assert service.solve_request(dict(request_fields, id=7), 10) == {"id": 7, "error": error}
+
+
+def test_valid_request_gets_the_solution():
+    response = service.solve_request({"id": "a", "puzzle": BOARD + " B4", "algorithm": "UCS", "heuristic": "ignored"}, 10)
+    tree = rushhour.UCSSearchTree([BOARD, "B4"], 1)
+    results = tree.uniform_cost_search(False)
+    assert response["id"] == "a"
+    assert response["algorithm"] == "UCS"
+    assert response["status"] == rushhour.SearchResult.SOLVED
+    assert (response["solution_length"], response["search_path_length"]) == (results[0], results[1])
+    assert response["solution"] == rushhour.SearchTree.format_moves(tree.solution_moves())
+
+
+def test_algorithm_options_are_applied():
+    response = service.solve_request({"id": 1, "puzzle": BOARD, "algorithm": "Weighted A*", "heuristic": 1, "weight": 3}, 10)
+    assert response["algorithm"] == "Weighted A* (w=3)"
+    assert response["status"] == rushhour.SearchResult.SOLVED
+
+
+@pytest.mark.parametrize("timeout", [1, 0.5, 1e6])
+def test_parse_timeout_accepts_positive_seconds(timeout):
+    assert service.SolverService.parse_timeout(timeout) == timeout
+
+
+@pytest.mark.parametrize("timeout", [0, -1, float("inf"), float("nan"), "10", None, True, [1]])
+def test_parse_timeout_rejects_other_values(timeout):
+    with pytest.raises(ValueError):
+        service.SolverService.parse_timeout(timeout)
+
+
+def test_read_requests_replies_to_invalid_lines_and_queues_the_others():
+    lines = ["not json\n", "[1, 2]\n", "\n", json.dumps({"id": 3, "timeout": -1}) + "\n",
+             json.dumps({"id": 4, "puzzle": BOARD, "timeout": 2}) + "\n", ""]
+    responses = []
+
+    async def run():
+        solver_service = service.SolverService(0, 10, 5) # no worker: the requests stay queued
+        lines_left = iter(lines)
+
+        async def readline():
+            return next(lines_left)
+
+        async def write(response):
+            responses.append(response)
+
+        await solver_service.read_requests(readline, write)
+        return [solver_service.queue.get_nowait()[0] for _ in range(solver_service.queue.qsize())]
+
+    queued = asyncio.run(run())
+    assert [response["id"] for response in responses] == [None, None, 3]
+    assert all(response["error"].startswith("invalid request: ") for response in responses)
+    assert responses[2]["error"] == "invalid request: timeout must be a positive number of seconds"
+    assert queued == [{"id": 4, "puzzle": BOARD, "timeout": 2.0}]
+
+
+# solve_request of the worker processes of test_stuck_worker_is_replaced: sleeps past the timeout for "stuck" requests
+def slow_solve_request(request, timeout, solution_cache_path=None):
+    if request.get("stuck"):
+        time.sleep(60)
+    return {"id": request.get("id")}
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="the worker process has to inherit the patched solve_request")
+def test_stuck_worker_is_replaced(monkeypatch):
+    monkeypatch.setattr(service, "solve_request", slow_solve_request) # inherited by the forked worker process
+    monkeypatch.setattr(service, "TIMEOUT_GRACE", 0.2)
+    worker = service.WorkerProcess()
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await worker.solve({"id": 1, "stuck": True}, 0.1)
+        return await worker.solve({"id": 2}, 0.1)
+
+    try:
+        start = time.time()
+        assert asyncio.run(run()) == {"id": 2}
+        assert time.time() - start < 10
+    finally:
+        worker.close()
@@ -0,0 +1,68 @@
+import rushhour
+
+RELABEL = str.maketrans("BCDEFGHIJKLMNOPQRSTUVWXYZ", "ZYXWVUTSRQPONMLKJIHGFEDCB") # relabels every car but the ambulance
+
+
+# returns the puzzle fields with every car but the ambulance relabelled
+def relabel(p):
+    return [field.translate(RELABEL) for field in p]
+
+
+# returns (SearchResult, moves) of a search of a puzzle
+def solve(p, algorithm="UCS", heuristic=None, budget=None):
+    tree_class, search = rushhour.SEARCHES[algorithm]
+    tree = tree_class(p, 1)
+    results = search(tree, heuristic, False, budget)
+    return results, tree.solution_moves()
+
+
+def test_canonicalize_relabels_cars_in_order_of_appearance():
+    key, labels = rushhour.SolutionCache.canonicalize(["..ZZ../..Y.../AAY..X/.....X", "Y4"])
+    assert key == "..BB../..C.../AAC..D/.....D C4"
+    assert labels == {"A": "A", ".": ".", "/": "/", "Z": "B", "Y": "C", "X": "D"}
+
+
+def test_canonicalize_keeps_only_the_fuel_that_differs_from_the_default():
+    board = "BBIJ....IJCC..IAAMGDDK.MGH.KL.GHFFL."
+    key, _ = rushhour.SolutionCache.canonicalize([board, "M7", "B100", "C3", "C100"])
+    assert key == rushhour.SolutionCache.canonicalize([board, "M7"])[0]
+    assert key.split()[1:] == ["F7"] # a later override wins, and default fuel is dropped
+
+
+def test_relabelled_puzzles_share_their_canonical_form(sample_puzzles, puzzles):
+    for p in sample_puzzles + puzzles[:10]:
+        assert rushhour.SolutionCache.canonicalize(relabel(p))[0] == rushhour.SolutionCache.canonicalize(p)[0]
+
+
+def test_relabelled_puzzle_gets_the_solution_in_its_own_labels(tmp_path, puzzles):
+    cache = rushhour.SolutionCache(str(tmp_path / "solutions.db"))
+    for p in puzzles[:5]:
+        results, moves = solve(p)
+        cache.store(p, "UCS", None, results, moves)
+        cached_results, cached_moves = cache.lookup(relabel(p), "UCS", None)
+        expected_results, expected_moves = solve(relabel(p))
+        assert cached_results[:2] == expected_results[:2]
+        assert cached_results.status == expected_results.status
+        assert cached_moves == expected_moves
+        assert cache.lookup(p, "UCS", None)[1] == moves # round trip back to the labels of the original
+        assert cache.lookup(p, "Algorithm A", 1) is None
+
+
+def test_budget_exceeded_results_are_not_cached(tmp_path, puzzles):
+    cache = rushhour.SolutionCache(str(tmp_path / "solutions.db"))
+    results, moves = solve(puzzles[0], budget=rushhour.SearchBudget(max_expansions=10))
+    assert results.status == rushhour.SearchResult.BUDGET_EXCEEDED
+    cache.store(puzzles[0], "UCS", None, results, moves)
+    assert cache.lookup(puzzles[0], "UCS", None) is None
+
+
+def test_least_recently_used_results_are_evicted(tmp_path, puzzles):
+    cache = rushhour.SolutionCache(str(tmp_path / "solutions.db"), max_entries=2)
+    solutions = [solve(p) for p in puzzles[1:4]]
+    cache.store(puzzles[1], "UCS", None, *solutions[0])
+    cache.store(puzzles[2], "UCS", None, *solutions[1])
+    cache.lookup(puzzles[1], "UCS", None) # puzzle 3 is now the least recently used
+    cache.store(puzzles[3], "UCS", None, *solutions[2])
+    assert cache.lookup(puzzles[2], "UCS", None) is None
+    assert cache.lookup(puzzles[1], "UCS", None) is not None
+    assert cache.lookup(puzzles[3], "UCS", None) is not None
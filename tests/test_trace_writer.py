@@ -0,0 +1,50 @@
+import gzip
+
+import rushhour
+
+# more lines than a few batches of the writer thread, with lines of different lengths
+LINES = [str(i) + " " + "x" * (i % 37) + "\n" for i in range(3 * rushhour.TraceWriter.BATCH_SIZE + 5)]
+
+
+# writes the lines through a TraceWriter, with sample_next deciding which ones are written as in the search loops
+def write(path, compress=False, sample=1):
+    writer = rushhour.TraceWriter(str(path), compress, sample)
+    for line in LINES:
+        if writer.sample_next():
+            writer.write(line)
+    writer.write("last")
+    writer.close()
+
+
+def test_output_is_identical_to_a_direct_write(tmp_path):
+    write(tmp_path / "trace.txt")
+    with open(tmp_path / "direct.txt", "w") as direct_file:
+        for line in LINES:
+            direct_file.write(line)
+        direct_file.write("last")
+    assert (tmp_path / "trace.txt").read_bytes() == (tmp_path / "direct.txt").read_bytes()
+
+
+def test_compressed_output_has_the_same_content(tmp_path):
+    write(tmp_path / "trace.txt", compress=True)
+    assert not (tmp_path / "trace.txt").exists()
+    with gzip.open(tmp_path / "trace.txt.gz", "rt") as trace_file:
+        assert trace_file.read() == "".join(LINES) + "last"
+
+
+def test_sampling_keeps_every_nth_line_from_the_first(tmp_path):
+    write(tmp_path / "trace.txt", sample=10)
+    assert (tmp_path / "trace.txt").read_text() == "".join(LINES[::10]) + "last"
+
+
+def test_search_file_matches_the_expanded_nodes(tmp_path, monkeypatch, puzzles):
+    # the search file of a search lists the expanded nodes in order, then the goal node
+    expanded = []
+    tree = rushhour.UCSSearchTree(puzzles[1], 2, on_expand=lambda tree, node, stats: expanded.append(tree.format_search_node(node)))
+    monkeypatch.setattr(rushhour.os.path, "realpath", lambda path: str(tmp_path / "rushhour.py"))
+    (tmp_path / "outputs").mkdir()
+    results = tree.uniform_cost_search(True)
+    lines = (tmp_path / "outputs" / "ucs-search-2.txt").read_text().split("\n")
+    assert lines[:-1] == expanded
+    assert len(lines) == results[1] + 1
+    assert lines[-1] == tree.format_search_node(tree.solution_path[-1])
@@ -0,0 +1,37 @@
+import pytest
+
+import rushhour
+
+pytest.importorskip("numpy")
+
+# (algorithm, heuristic) searches compared: UCS and Algorithm A h1 expand batches (h1 scored by the VectorizedExpander,
+# h7 per child), beam search expands whole levels and the other searches expand one node at a time
+SEARCHES = [("UCS", None), ("Algorithm A", 1), ("Algorithm A", 7), ("Beam", 1), ("GBFS", 1), ("Algorithm A", 4)]
+
+
+# returns (solution length, expansions, solution moves) of a search
+def run(puzzle, algorithm, heuristic, vectorized):
+    tree_class, search = rushhour.SEARCHES[algorithm]
+    tree = tree_class(puzzle, 0, vectorized=vectorized)
+    results = search(tree, heuristic, False, None)
+    return results[0], results[1], tree.solution_moves()
+
+
+@pytest.mark.parametrize("algorithm, heuristic", SEARCHES)
+def test_vectorized_expansions_match_per_node_path(sample_puzzles, puzzles, algorithm, heuristic):
+    for puzzle in sample_puzzles + puzzles[:6]:
+        assert run(puzzle, algorithm, heuristic, True) == run(puzzle, algorithm, heuristic, False), puzzle
+
+
+def test_expand_matches_successors(puzzles):
+    for puzzle in puzzles[:10]:
+        bitboard = rushhour.RushHour(puzzle).bitboard
+        expander = rushhour.VectorizedExpander(bitboard)
+        states = [bitboard.initial_state] + [child for _, _, _, child in bitboard.successors(bitboard.initial_state)]
+        parents, cars, actions, moves, positions = expander.expand(states)
+        vectorized = [(states[parent], car, action, car_moves, tuple(child))
+                      for parent, car, action, car_moves, child in zip(parents.tolist(), cars.tolist(), actions.tolist(),
+                                                                       moves.tolist(), positions.tolist())]
+        expected = [(state, car, action, car_moves, child[0])
+                    for state in states for car, action, car_moves, child in bitboard.successors(state)]
+        assert vectorized == expected